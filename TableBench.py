@@ -0,0 +1,237 @@
+"""Benchmarks for TableWidget.
+
+A display is needed. Run it headless under a virtual X server:
+
+    xvfb-run -s "-screen 0 1920x1080x24" python TableBench.py [-o results.json]
+
+The suite loads 2000x2000 and 100000x50 tables with set_data, then times
+unit and page scrolling, moveto jumps, Home/End and a sequence of window
+resizes, and the time to the first frame of a table in a maximised
+window. It reports, as JSON, the p50/p95/p99 frame times, the Tk calls
+per frame and the peak RSS, to compare between releases. Each run is
+made in a process of its own, so its peak RSS is its own.
+"""
+
+import argparse
+import json
+import math
+import random
+import resource
+import subprocess
+import sys
+import time
+import tkinter as tk
+from types import SimpleNamespace
+
+from TableWidget import TableFrame
+
+
+class CountingTk:
+    """Wraps the Tcl interpreter of a Tk root and counts the calls made
+    from Python into Tcl.
+    """
+
+    def __init__(self, tkapp):
+        self._tkapp = tkapp
+        self.calls = 0
+
+    def call(self, *args):
+        self.calls += 1
+        return self._tkapp.call(*args)
+
+    def eval(self, script):
+        self.calls += 1
+        return self._tkapp.eval(script)
+
+    def __getattr__(self, name):
+        return getattr(self._tkapp, name)
+
+
+def make_data(rows, cols):
+    return [[i*cols+j for j in range(cols)] for i in range(rows)]
+
+
+def percentile(times, p):
+    """the p-th percentile of sorted times, nearest rank"""
+    if not times:
+        return 0.0
+    k = max(0, min(len(times) - 1, math.ceil(p / 100.0 * len(times)) - 1))
+    return times[k]
+
+
+def peak_rss():
+    """peak resident set size of the process in bytes"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024   # kB on Linux
+
+
+def time_frames(root, counter, step, frames, update=False):
+    """run step(i) for each frame until it is on screen, and get the
+    frame time stats in ms and the Tk calls per frame.
+    """
+    times = []
+    counter.calls = 0
+    for i in range(frames):
+        start = time.perf_counter()
+        step(i)
+        if update:
+            root.update()   # deliver <Configure> of resizes
+        else:
+            root.update_idletasks()
+        times.append((time.perf_counter() - start) * 1000)
+    calls = counter.calls
+    times.sort()
+    return {
+        'frames': frames,
+        'p50_ms': percentile(times, 50),
+        'p95_ms': percentile(times, 95),
+        'p99_ms': percentile(times, 99),
+        'max_ms': times[-1],
+        'tk_calls_per_frame': calls / frames,
+    }
+
+
+def key(keysym):
+    return SimpleNamespace(keysym=keysym, widget=None)
+
+
+def run_scenarios(table_frame, root, counter, frames, seed=0):
+    """time each scripted interaction from the top left of the table"""
+    rng = random.Random(seed)
+    home = lambda: (table_frame.on_key_scroll(key('Home')), root.update())
+    results = {}
+
+    home()
+    results['unit_scroll'] = time_frames(root, counter,
+        lambda i: table_frame.on_vsb_scroll("scroll", "1", "units"), frames)
+    home()
+    results['unit_scroll_horizontal'] = time_frames(root, counter,
+        lambda i: table_frame.on_hsb_scroll("scroll", "1", "units"), frames)
+    home()
+    pages = max(1, table_frame.data_rows // max(1, table_frame.count_row()) - 1)
+    results['page_scroll'] = time_frames(root, counter,
+        lambda i: table_frame.on_vsb_scroll("scroll", "-1" if i // pages % 2 else "1", "pages"),
+        frames)
+    home()
+    jumps = [rng.random() for i in range(frames)]
+    results['moveto'] = time_frames(root, counter,
+        lambda i: table_frame.on_vsb_scroll("moveto", str(jumps[i])), frames)
+    home()
+    results['home_end'] = time_frames(root, counter,
+        lambda i: table_frame.on_key_scroll(key('End' if i % 2 == 0 else 'Home')), frames)
+    home()
+    sizes = [(1920, 1080), (1280, 720), (800, 600), (1600, 900), (1024, 768)]
+    results['resize'] = time_frames(root, counter,
+        lambda i: root.geometry("%dx%d" % sizes[i % len(sizes)]), frames, update=True)
+    return results
+
+
+def bench_first_frame(data, batch=True, backend='entry'):
+    """time from creating a TableFrame in a maximised window to its
+    first frame of data on screen, and the Tk calls made.
+    """
+    root = tk.Tk()
+    # maximised, also without a window manager as under xvfb-run
+    root.geometry("%dx%d+0+0" % (root.winfo_screenwidth(), root.winfo_screenheight()))
+    counter = root.tk = CountingTk(root.tk)
+    root.update()
+
+    start = time.perf_counter()
+    table_frame = TableFrame(root, backend=backend)
+    table_frame.pack(side="top", fill="both", expand=True)
+    table_frame.set_batch_render(batch)
+    table_frame.set_data(data, data_rows=len(data), data_cols=len(data[0]))
+    root.update()
+    seconds = time.perf_counter() - start
+
+    result = {
+        'first_frame_ms': seconds * 1000,
+        'tk_calls': counter.calls,
+        'cells': table_frame.count_row() * table_frame.count_col(),
+    }
+    root.destroy()
+    return result
+
+
+def bench_suite(rows, cols, frames=50, batch=True, backend='entry', instruments=False):
+    """load a rows x cols table and time the scenarios on it, with the
+    stats of its instruments if instruments, see TableFrame.stats.
+    """
+    data = make_data(rows, cols)
+    first_frame = bench_first_frame(data, batch, backend)
+    root = tk.Tk()
+    root.geometry("1920x1080")
+    counter = root.tk = CountingTk(root.tk)
+    table_frame = TableFrame(root, backend=backend)
+    table_frame.pack(side="top", fill="both", expand=True)
+    table_frame.set_batch_render(batch)
+    if instruments:
+        table_frame.set_instruments()
+    root.update()
+
+    counter.calls = 0
+    start = time.perf_counter()
+    table_frame.set_data(data, data_rows=rows, data_cols=cols)
+    root.update_idletasks()
+    set_data_ms = (time.perf_counter() - start) * 1000
+    set_data_calls = counter.calls
+    root.update()
+
+    result = {
+        'rows': rows,
+        'cols': cols,
+        'backend': backend,
+        'batch': batch,
+        'set_data_ms': set_data_ms,
+        'set_data_tk_calls': set_data_calls,
+        'first_frame': first_frame,
+        'scenarios': run_scenarios(table_frame, root, counter, frames),
+    }
+    if instruments:
+        result['stats'] = table_frame.stats()
+    root.destroy()
+    result['peak_rss_bytes'] = peak_rss()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-o', '--output', help="write the JSON results to a file")
+    parser.add_argument('--frames', type=int, default=50, help="frames per scenario")
+    parser.add_argument('--backend', choices=['entry', 'canvas'], action='append',
+                        help="rendering backend, repeatable; both by default")
+    parser.add_argument('--no-batch', action='store_true', help="without batched rendering")
+    parser.add_argument('--instruments', action='store_true',
+                        help="add the TableFrame instruments' stats, at their cost")
+    parser.add_argument('--run', nargs=3, metavar=('BACKEND', 'ROWS', 'COLS'),
+                        help=argparse.SUPPRESS)     # one run, in a child process
+    args = parser.parse_args(argv)
+
+    if args.run:
+        backend, rows, cols = args.run[0], int(args.run[1]), int(args.run[2])
+        print(json.dumps(bench_suite(rows, cols, args.frames, not args.no_batch,
+                                     backend, args.instruments)))
+        return
+
+    results = {'python': sys.version.split()[0], 'tk': tk.TkVersion, 'runs': []}
+    for backend in args.backend or ['entry', 'canvas']:
+        for rows, cols in ((2000, 2000), (100000, 50)):
+            command = [sys.executable, __file__, '--run', backend, str(rows), str(cols),
+                       '--frames', str(args.frames)]
+            if args.no_batch:
+                command.append('--no-batch')
+            if args.instruments:
+                command.append('--instruments')
+            output = subprocess.run(command, stdout=subprocess.PIPE, check=True).stdout
+            results['runs'].append(json.loads(output))
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,26 +1,85 @@
+import asyncio
+import bisect
+import csv
+import functools
+import io
+import json
+import mmap
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import tkinter as tk
+import tkinter.font as tkfont
 from tkinter import ttk
 
+try:
+    import numpy as np
+except ImportError:     # numpy is only needed by ArrayTableModel
+    np = None
+
+
+# placeholder value of a cell whose data has not arrived yet
+LOADING = object()
+
+_tcl_special = re.compile(r'([\\$\[\]{}";\s\x00])')
+_tcl_escapes = {'\n': '\\n', '\t': '\\t', '\r': '\\r', '\x00': '\\000'}    # NUL cannot be in a script
+
+def tcl_quote(value):
+    """Quote value as a single word of a Tcl script."""
+    if isinstance(value, (tuple, list)):
+        value = ' '.join(tcl_quote(v) for v in value)
+    s = str(value)
+    if not s:
+        return '{}'
+    return _tcl_special.sub(lambda m: _tcl_escapes.get(m.group(1), '\\' + m.group(1)), s)
+
+
+def timed(name):
+    """time the calls of a method as span <name> of self.instruments,
+    see Instruments; without instruments, at the cost of a check.
+    """
+    def decorate(method):
+        @functools.wraps(method)
+        def timed_method(self, *args, **kwargs):
+            instruments = self.instruments
+            if instruments is None:
+                return method(self, *args, **kwargs)
+            instruments.depth += 1
+            start = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                instruments.depth -= 1
+                instruments.span(name, seconds)
+                if not instruments.depth:   # the outermost span is a frame
+                    instruments.frame(name, seconds)
+        return timed_method
+    return decorate
+
+
 class TableFrame(tk.Frame):
     """A spreadsheet-like widget having a row header, a column header
     and a table with thousands of rows and columns.
     """
 
-    def __init__(self, container, data=None, data_rows=None, data_cols=None, offset_x=0, offset_y=0, default=None):
-
+    def __init__(self, container, data=None, data_rows=None, data_cols=None, offset_x=0, offset_y=0, default=None, backend='entry'):
+        """backend is 'entry' for one Entry widget per cell, or 'canvas'
+        for cells drawn as items on the canvases, see CanvasCells.
+        """
 
         tk.Frame.__init__(self, container)
         self.container = container
         self.data = data
         self.offset_x = offset_x
         self.offset_y = offset_y
-
-        self.row_header = row_header = Cells(master=self, data="row_header")
-        self.col_header = col_header = Cells(master=self, data="col_header")
-        self.table = table = Cells(master=self, data=data)
-
-        row_header.insert_col(0)
-        col_header.insert_row(0)
+        self.backend = backend
 
         self.vsb = vsb = tk.Scrollbar(self, orient="vertical", command=self.on_vsb_scroll)
         self.hsb = hsb = tk.Scrollbar(self, orient="horizontal", command=self.on_hsb_scroll)
@@ -33,16 +92,23 @@ class TableFrame(tk.Frame):
         self.ch_canvas = ch_canvas = MyCanvas(master=self, borderwidth=0,
                                                height=20, background="#d4d4d4")
 
+        self.dirty = {}     # panes to redraw -> only scrolled, see schedule_redraw
+        self.panes = []     # the Cells grids, the frozen ones last
+        self.row_header = row_header = self._new_pane(rh_canvas, "row_header", scroll_cols=False)
+        self.col_header = col_header = self._new_pane(ch_canvas, "col_header", scroll_rows=False)
+        self.table = table = self._new_pane(canvas, data)
+
+        # cover what the grids overscan beyond their canvases
+        self.corners = [tk.Frame(self, background="#d4d4d4") for i in range(2)]
+
         rh_canvas.grid(column=0, row=1, sticky='nsew')
         ch_canvas.grid(column=1, row=0, sticky='nsew')
 
         canvas.grid(column=1, row=1, sticky='nsew')
         vsb.grid(column=2, row=1, sticky='ns')
         hsb.grid(column=1, row=2, sticky='ew')
-
-        canvas.create_window((0, 0), window=self.table, anchor="nw", tags="self.table")
-        rh_canvas.create_window((0, 0), window=self.row_header, anchor="nw", tags="self.row_header")
-        ch_canvas.create_window((0, 0), window=self.col_header, anchor="nw", tags="self.col_header")
+        self.corners[0].grid(column=0, row=0, sticky='nsew')
+        self.corners[1].grid(column=2, row=2, sticky='nsew')
 
         self.rowconfigure(0, weight=0)      # row header
         self.columnconfigure(0, weight=0)   # col header
@@ -59,6 +125,21 @@ class TableFrame(tk.Frame):
 
         self.table.data = data
         self.canvas.data = data
+        self.model = self.make_model(data or [], data_rows or 0, data_cols or 0)
+        self.styles = TableModel.styles
+        self.clear_style_cache()
+        self.row_index = None   # view row -> backing store row, if sorted/filtered
+        self.sort_order = []    # [(col, descending)], the first the primary
+        self.sort_cache = {}    # col -> sort keys of its backing store rows
+        self.filters = {}       # col -> predicate
+        self.filter_index = None    # backing store rows passing the filters
+        self.filter_vectorized = False
+        self.filter_generation = 0
+        self.matches = []           # backing store (row, col) found by find()
+        self.current_match = None   # view (row, col) of the last find_next()
+        self.find_index = None
+        self.find_generation = 0
+        self.set_loading_style(value='...', fg='#999999')
         self.default = self.cell_options_default()
         if default:
             self.default.update(default)
@@ -70,6 +151,237 @@ class TableFrame(tk.Frame):
         self.data_cols = 0
         self.visible_rows = 0
         self.visible_cols = 0
+        self.view_width = 0     # pixels of the table canvas
+        self.view_height = 0
+        self.row_heights = {}   # backing store row -> height, if set
+        self.row_sizes = SizeIndex(self.cell_geometry()[1] + 1)     # of view rows
+        self.col_sizes = SizeIndex(self.chars_width(self.default.get('w', self.CELL_WIDTH)) + 1)
+
+        row_header.insert_col(0)
+        col_header.insert_row(0)
+
+    def _new_pane(self, canvas, data, scroll_rows=True, scroll_cols=True):
+        """create a Cells grid shown on canvas, following offset_y if
+        scroll_rows and offset_x if scroll_cols.
+        """
+        if self.backend == 'canvas':
+            pane = CanvasCells(master=self, canvas=canvas, data=data)
+        else:
+            pane = Cells(master=self, data=data)
+            pane.window = (canvas, canvas.create_window((0, 0), window=pane, anchor="nw"))
+        pane.scroll_rows = scroll_rows
+        pane.scroll_cols = scroll_cols
+        pane.set_batch(self.batch_render)
+        self.panes.append(pane)
+        return pane
+
+    frozen_rows = 0
+    frozen_cols = 0
+    frozen_top = None       # the frozen rows, scrolled by columns
+    frozen_left = None      # the frozen columns, scrolled by rows
+    frozen_corner = None
+    frozen_row_header = None
+    frozen_col_header = None
+    def set_frozen(self, rows=0, cols=0):
+        """freeze the first <rows> rows and <cols> columns of the view,
+        which stay in view while the others scroll under them.
+
+        The frozen cells are panes of the same kind as the table, sharing
+        its style cache and shown-cell diffing. A pane is only redrawn
+        when it scrolls or its own data changes: the frozen rows never
+        on scrolling by rows, the frozen columns never by columns.
+        """
+        if self.frozen_top is None and (rows or cols):
+            self.frozen_left = self._new_pane(self.canvas, self.data, scroll_cols=False)
+            self.frozen_top = self._new_pane(self.canvas, self.data, scroll_rows=False)
+            self.frozen_corner = self._new_pane(self.canvas, self.data, False, False)
+            self.frozen_row_header = self._new_pane(self.rh_canvas, "row_header", False, False)
+            self.frozen_col_header = self._new_pane(self.ch_canvas, "col_header", False, False)
+            self._stack_panes()
+        self.frozen_rows = rows
+        self.frozen_cols = cols
+        self.offset_y = max(self.offset_y, rows)
+        self.offset_x = max(self.offset_x, cols)
+        self.shift_x = 0
+        self.shift_y = 0
+        self._sizes_changed()
+
+    def _stack_panes(self):
+        """stack the frozen panes over the body scrolling under them, and
+        the headers, corners and scrollbars over what the grids overscan.
+        """
+        frozen = [self.frozen_left, self.frozen_top, self.frozen_corner,
+                  self.frozen_row_header, self.frozen_col_header, self.frozen_footer]
+        if self.backend == 'canvas':
+            for pane in frozen:
+                if pane:
+                    pane.canvas.tag_raise(pane.tag)
+            return
+        for w in [self.canvas, self.table] + frozen[:3] + [
+                  self.rh_canvas, self.row_header, frozen[3],
+                  self.ch_canvas, self.col_header, frozen[4],
+                  getattr(self, 'ft_canvas', None), self.footer_pane, frozen[5],
+                  getattr(self, 'fh_canvas', None), self.footer_header,
+                  self.vsb, self.hsb] + self.corners:
+            if w:
+                w.lift()
+
+    def redraw_panes(self, rows=True, cols=True, scrolled=False):
+        """schedule a redraw of the panes following offset_y if rows, or
+        offset_x if cols; by default all of them. If scrolled, only the
+        offsets changed, see schedule_redraw.
+        """
+        self.schedule_redraw([pane for pane in self.panes
+                              if (rows and pane.scroll_rows) or (cols and pane.scroll_cols)
+                              or (rows and cols)], scrolled=scrolled)
+
+    redraw_pending = None   # after_idle id of the scheduled redraw
+    layout_pending = False
+    def schedule_redraw(self, panes=(), layout=False, scrolled=False):
+        """mark panes dirty, and the size and place of the grids if
+        layout, for one redraw once Tk is idle, see _redraw_idle. If
+        scrolled, the panes only show other offsets and may rotate what
+        they show, see Cells.scroll, unless also marked otherwise.
+
+        Tk only gets idle when no input is left, so a burst of wheel or
+        key-repeat events, inserts and deletes costs one redraw at the
+        latest offsets and the frames in between are dropped.
+        """
+        dirty = self.dirty
+        for pane in panes:
+            dirty[pane] = scrolled and dirty.get(pane, True)
+        if layout:
+            self.layout_pending = True
+        if self.redraw_pending is None:
+            self.redraw_pending = self.after_idle(self._redraw_idle)
+
+    @timed('idle_redraw')
+    def _redraw_idle(self):
+        try:
+            if self.layout_pending:
+                self.layout_pending = False
+                self._layout_grids()    # may mark more panes dirty
+            dirty, self.dirty = self.dirty, {}
+            for pane in self.panes:
+                if pane in dirty:
+                    if dirty[pane]:
+                        pane.scroll()
+                    else:
+                        pane.redraw()
+        finally:
+            self.redraw_pending = None
+            if self.dirty or self.layout_pending:   # scheduled during the pass
+                self.redraw_pending = self.after_idle(self._redraw_idle)
+
+    def redraw_now(self):
+        """do the scheduled redraw now, if any"""
+        if self.redraw_pending is not None:
+            self.after_cancel(self.redraw_pending)
+            self._redraw_idle()
+
+    footer = ()             # the aggregates shown, a footer row each
+    aggregates = None       # ColumnAggregates of the model, while shown
+    footer_pane = None
+    frozen_footer = None    # the footer of the frozen columns
+    footer_header = None
+    def set_footer(self, names=('sum', 'min', 'max', 'mean', 'count')):
+        """show the aggregates of names, see ColumnAggregates, in footer
+        rows under the columns; no names hides the footer.
+
+        The aggregates are computed once, then kept up to date as cells
+        are set through Cells.set_value/set_data_value.
+        """
+        self.footer = names = tuple(names)
+        for name in names:
+            if name not in ColumnAggregates.names:
+                raise ValueError("unknown aggregate %r" % (name,))
+        if not names:
+            self.aggregates = None
+            if self.footer_pane is not None:
+                self.footer_pane.resize(0, 0)
+                self.frozen_footer.resize(0, 0)
+                self.footer_header.resize(0, 1)
+                self.ft_canvas.grid_remove()
+                self.fh_canvas.grid_remove()
+                self.corners[2].grid_remove()
+            return
+
+        if self.footer_pane is None:
+            self.ft_canvas = MyCanvas(master=self, borderwidth=0, background="#d4d4d4")
+            self.fh_canvas = MyCanvas(master=self, borderwidth=0, width=40, background="#d4d4d4")
+            self.footer_pane = self._new_pane(self.ft_canvas, "footer", scroll_rows=False)
+            self.frozen_footer = self._new_pane(self.ft_canvas, "footer", False, False)
+            self.footer_header = self._new_pane(self.fh_canvas, "footer_header", False, False)
+            self.footer_header.insert_col(0)
+            self.corners.append(tk.Frame(self, background="#d4d4d4"))
+            self.hsb.grid(column=1, row=3, sticky='ew')
+            self.corners[1].grid(column=2, row=3, sticky='nsew')
+            self.rowconfigure(3, weight=0)
+        self.ft_canvas.configure(height=len(names) * self.row_sizes.default)
+        self.fh_canvas.grid(column=0, row=2, sticky='nsew')
+        self.ft_canvas.grid(column=1, row=2, sticky='nsew')
+        self.corners[2].grid(column=2, row=2, sticky='nsew')
+        self.footer_header.resize(len(names), 1)
+        self._stack_panes()
+
+        if self.aggregates is None:
+            self.aggregates = ColumnAggregates(self.model)
+        if self.view_width:
+            self._fit_visible()
+            self.schedule_redraw([self.footer_header, self.footer_pane, self.frozen_footer])
+
+    def footer_value(self, row, col):
+        """get the text of footer row <row> under column <col>"""
+        if self.aggregates is None or col >= self.data_cols:
+            return ''
+        value = self.aggregates.get(col, self.footer[row])
+        if value is None:
+            return ''
+        if isinstance(value, float):
+            return '%.10g' % value
+        return value
+
+    def refresh_footer(self, col=None):
+        """redraw the footer under <col>, by default all of it"""
+        for pane in (self.footer_pane, self.frozen_footer):
+            if pane is None or not self.footer:
+                continue
+            if col is None or pane in self.dirty:
+                self.schedule_redraw([pane])
+                continue
+            j = col - pane.origin()[1]
+            if 0 <= j < pane.count_col():
+                pane.redraw_region(0, pane.count_row(), j, j + 1)
+
+    instruments = None
+    def set_instruments(self, instruments=True):
+        """turn on the timings and counters of the hot paths, see
+        Instruments, into instruments or a new Instruments if True;
+        None turns them off. Return the instruments.
+        """
+        if instruments is True:
+            instruments = Instruments()
+        self.instruments = instruments
+        for pane in self.panes:
+            pane.instruments = instruments
+        for canvas in (self.canvas, self.rh_canvas, self.ch_canvas,
+                       getattr(self, 'ft_canvas', None), getattr(self, 'fh_canvas', None)):
+            if canvas is not None:
+                canvas.instruments = instruments
+        return instruments
+
+    def stats(self):
+        """get the stats of the instruments, and of the model if it has
+        any, see TileCache.stats.
+        """
+        stats = self.instruments.stats() if self.instruments else {}
+        if hasattr(self.model, 'stats'):
+            stats['model'] = self.model.stats()
+        return stats
+
+    def frozen_size(self):
+        """get (width, height) in pixels of the frozen columns and rows"""
+        return (self.col_sizes.offset(self.frozen_cols), self.row_sizes.offset(self.frozen_rows))
 
     keys = ['value', 'font', 'justify', 'bg', 'fg', 'width', 'height', 'state'] # tk keys
     ikeys = ['v', 'ft', 'a', 'b', 'f', 'w', 'h', 's'] # internal saved format
@@ -112,7 +424,12 @@ class TableFrame(tk.Frame):
         d.update(default, **kwargs)
         di = self.get_ikeysdict(d)
 
-        self.default.update(di)
+        self._update_default(self.default, di)
+        if 'w' in di:
+            self.col_sizes.set_default(self.chars_width(di['w']) + 1)
+            for col in range(len(self.col_header.col_defaults)):
+                self.col_sizes.set(col, self.column_width(col) + 1)
+            self._sizes_changed()
 
     def set_row_default(self, default={}, **kwargs):
         """set default cell attributes, for row header.
@@ -126,7 +443,7 @@ class TableFrame(tk.Frame):
         d.update(default, **kwargs)
         di = self.get_ikeysdict(d)
 
-        self.row_default.update(di)
+        self._update_default(self.row_default, di)
 
     def set_col_default(self, default={}, **kwargs):
         """set default cell attributes, for column header.
@@ -140,7 +457,79 @@ class TableFrame(tk.Frame):
         d.update(default, **kwargs)
         di = self.get_ikeysdict(d)
 
-        self.col_default.update(di)
+        self._update_default(self.col_default, di)
+
+    def _update_default(self, default, di):
+        if any(k not in default or default[k] != v for k, v in di.items()):
+            default.update(di)
+            self.clear_style_cache()
+
+    loading_style = 0
+    def set_loading_style(self, default={}, **kwargs):
+        """set the placeholder value and attributes of cells whose data
+        has not arrived yet from a model loading it in the background.
+        """
+        d = {}
+        d.update(default, **kwargs)
+        self.loading_style = self.styles.intern(self.get_ikeysdict(d))
+        self.clear_style_cache()
+
+    style_cache = None
+    def clear_style_cache(self):
+        """forget resolved cell attributes, whenever any default changes,
+        and redraw the panes in the new styles.
+        """
+        self.style_cache = {}
+        self.redraw_panes()
+
+    def resolve_style(self, kind, row_style, col_style, cell_style):
+        """get (default value, attrs in tk keys) of a cell of kind
+        'row_header', 'col_header', 'table', 'loading', 'footer' or
+        'footer_header', from the
+        table/row/col default and the row, column and cell style ids.
+        The cell style of 'loading' is the loading style. A 'footer' cell
+        is styled as the column header, a 'footer_header' one as the row
+        header.
+
+        Resolved attrs are cached by the style ids, so the cascade is
+        merged once per distinct combination rather than per cell. They
+        are shared and must not be modified.
+        """
+        key = (kind, row_style, col_style, cell_style)
+        resolved = self.style_cache.get(key)
+        if self.instruments is not None:
+            self.instruments.count('style_cache_misses' if resolved is None else 'style_cache_hits')
+        if resolved is None:
+            get = self.styles.get
+            if kind in ('row_header', 'footer_header'):
+                cd = self.row_default.copy()
+                cd.update(get(row_style))
+            elif kind in ('col_header', 'footer'):
+                cd = self.col_default.copy()
+                cd.update(get(col_style))
+            elif kind == 'loading':
+                cd = self.default.copy()
+                cd.update(get(row_style))
+                cd.update(get(col_style))
+                cd.update(get(cell_style))
+            else:
+                cd = self.default.copy()
+                cd.update(get(row_style))
+                cd.update(get(col_style))
+                cd.update(self.model.styles.get(cell_style))
+            value = cd.pop('v', None)
+            attrs = self.get_keysdict(cd)
+
+            bg = attrs.get('bg')
+            if bg:
+                state = attrs.get('state')
+                if state == 'readonly':
+                    attrs['readonlybackground'] = bg
+                elif state == 'disabled':
+                    attrs['disabledbackground'] = bg
+
+            resolved = self.style_cache[key] = (value, attrs)
+        return resolved
 
     def set_value(self, row, col, value):
         self.table.set_value(row, col, value)
@@ -151,25 +540,126 @@ class TableFrame(tk.Frame):
     def set_col_header(self, col, value):
         self.col_header.set_value(0, col, value)
 
+    @timed('scroll')
     def on_vsb_scroll(self, *args):
+        offset = self.offset_y
         self.canvas.yview(*args)
         self.rh_canvas.yview(*args)
+        self._note_scroll('y', self.offset_y - offset)
 
+    @timed('scroll')
     def on_hsb_scroll(self, *args):
+        offset = self.offset_x
         self.canvas.xview(*args)
         self.ch_canvas.xview(*args)
+        self._note_scroll('x', self.offset_x - offset)
+
+    prefetcher = None
+    def set_prefetch(self, workers=2, max_windows=4):
+        """prefetch the viewport windows ahead of scrolling on a pool of
+        workers threads, see Prefetcher. The model should be a TileCache
+        for the prefetched windows to be kept. workers=0 turns it off.
+        """
+        if self.prefetcher:
+            self.prefetcher.close()
+        self.prefetcher = Prefetcher(self, workers, max_windows) if workers else None
 
+    def _note_scroll(self, axis, delta):
+        if self.prefetcher and delta:
+            self.prefetcher.on_scroll(axis, delta)
+
+    @timed('scroll')
     def on_mouse_scroll(self, event):
-        if event.delta > 0:
-            self.on_vsb_scroll("scroll", "-3", "units")
+        """scroll 3 rows a wheel notch, smoothly by pixels"""
+        if sys.platform == 'darwin':    # delta is in lines
+            self.scroll_pixels(0, -event.delta * self.row_sizes.default)
+        else:                           # delta is 120 a notch
+            self.scroll_pixels(0, -event.delta * 3 * self.row_sizes.default // 120)
+
+    grid_size = None
+    shift_x = 0     # pixels of the first on-screen column scrolled out of view
+    shift_y = 0     # pixels of the first on-screen row scrolled out of view
+    overscan = 1    # on-screen rows and columns beyond the view
+    def set_overscan(self, overscan=1):
+        """render overscan more rows and columns than in view, so that
+        pixel scrolling of less than them only moves the grid.
+        """
+        self.overscan = overscan
+        self._sizes_changed()
+
+    def scroll_pixels(self, dx=0, dy=0):
+        """scroll by pixels. Within a row or column only the on-screen
+        grid moves; the cells are redrawn when a row or column crosses
+        the edge of the view.
+        """
+        offset_x, offset_y = self.offset_x, self.offset_y
+        if dy:
+            self.move_to_pixel('y', self.row_sizes.offset(offset_y) + self.shift_y + dy)
+        if dx:
+            self.move_to_pixel('x', self.col_sizes.offset(offset_x) + self.shift_x + dx)
+        self._note_scroll('y', self.offset_y - offset_y)
+        self._note_scroll('x', self.offset_x - offset_x)
+
+    def move_to_pixel(self, axis, pixel):
+        """scroll the top ('y') or left ('x') of the view to <pixel>"""
+        # the body scrolls from the first unfrozen row or column
+        frozen_w, frozen_h = self.frozen_size()
+        if axis == 'y':
+            sizes, count, view = self.row_sizes, self.data_rows, self.view_height - frozen_h
+            first = frozen_h
+        else:
+            sizes, count, view = self.col_sizes, self.data_cols, self.view_width - frozen_w
+            first = frozen_w
+        pixel = max(min(int(pixel), sizes.offset(count) - view), first)
+        offset = sizes.find(pixel)
+        shift = pixel - sizes.offset(offset)
+
+        if axis == 'y':
+            self.shift_y = shift
+            if offset != self.offset_y:
+                self.canvas.set_row_offset(offset)
         else:
-            self.on_vsb_scroll("scroll", "3", "units")
+            self.shift_x = shift
+            if offset != self.offset_x:
+                self.canvas.set_col_offset(offset)
+        self._fit_visible()
+        self.reset_scrollbars()
+
+    def _place_grid(self):
+        """place the on-screen grids, the body after the frozen rows and
+        columns and scrolled by shift_x/shift_y under them
+        """
+        frozen_w, frozen_h = self.frozen_size()
+        x = frozen_w - self.shift_x
+        y = frozen_h - self.shift_y
+        self.table.move_grid(x, y)
+        self.row_header.move_grid(0, y)
+        self.col_header.move_grid(x, 0)
+        if self.footer_pane:
+            self.footer_pane.move_grid(x, 0)
+        if self.frozen_top:
+            self.frozen_top.move_grid(x, 0)
+            self.frozen_left.move_grid(0, y)
 
     unit = 1
     def set_key_scroll_size(self, unit=1):
         self.unit = unit
 
+    batch_render = False
+    def set_batch_render(self, batch=True):
+        """render each redraw of the headers, the table and the frozen
+        and footer panes as one Tcl script rather than a few Tk calls
+        per cell. Panes created later follow.
+        """
+        self.batch_render = batch
+        for pane in self.panes:
+            pane.set_batch(batch)
+
+    @timed('key')
     def on_key_scroll(self, event):
+        if isinstance(event.widget, tk.Entry) and event.widget.cget('state') == 'normal':
+            return  # keys are for the cell being edited
+
         if event.keysym == 'Up':
             self.on_vsb_scroll("scroll", "-"+str(self.unit), "units")
         if event.keysym == 'Down':
@@ -183,36 +673,126 @@ class TableFrame(tk.Frame):
         if event.keysym == 'Next':  #PageDown
             self.on_vsb_scroll("scroll", "1", "pages")
         if event.keysym == 'Home':
-            if self.offset_x > 0 or self.offset_y > 0:
-                self.hsb.set(0, min(self.visible_cols/self.data_cols, 1))
-                self.vsb.set(0, min(self.visible_rows/self.data_rows, 1))
-                self.offset_x = 0
-                self.offset_y = 0
-                self.row_header.redraw()
-                self.col_header.redraw()
-                self.table.redraw()
+            if (self.offset_x > self.frozen_cols or self.offset_y > self.frozen_rows
+                    or self.shift_x or self.shift_y):
+                self.offset_x = self.frozen_cols
+                self.offset_y = self.frozen_rows
+                self.shift_x = 0
+                self.shift_y = 0
+                self._fit_visible()
+                self.reset_scrollbars()
+                self.redraw_panes(scrolled=True)
         if event.keysym == 'End':
-            rs = max(0, self.data_rows - self.visible_rows)
-            cs = max(0, self.data_cols - self.visible_cols)
+            rs = self.last_row_offset()
+            cs = self.last_col_offset()
             if self.offset_x < cs or self.offset_y < rs:
-                self.hsb.set(cs/self.data_cols, 1)
-                self.vsb.set(rs/self.data_rows, 1)
                 self.offset_x = cs
                 self.offset_y = rs
-                self.row_header.redraw()
-                self.col_header.redraw()
-                self.table.redraw()
+                self.shift_x = 0
+                self.shift_y = 0
+                self._fit_visible()
+                self.reset_scrollbars()
+                self.redraw_panes(scrolled=True)
 
     def reset_scrollbars(self):
-        """reset scrollbars based on new data/offsets and visible area.
+        """reset scrollbars based on new data/offsets and visible area,
+        in pixels.
+        """
+        frozen_w, frozen_h = self.frozen_size()
+        height = max(self.row_sizes.offset(self.data_rows) - frozen_h, 1)
+        width = max(self.col_sizes.offset(self.data_cols) - frozen_w, 1)
+        y = self.row_sizes.offset(self.offset_y) + self.shift_y - frozen_h
+        x = self.col_sizes.offset(self.offset_x) + self.shift_x - frozen_w
+        self.vsb.set(y / height, (y + self.view_height - frozen_h) / height)
+        self.hsb.set(x / width, (x + self.view_width - frozen_w) / width)
+
+    def last_row_offset(self):
+        """get the largest offset_y, showing the last row in full"""
+        view = self.view_height - self.frozen_size()[1]
+        return max(self.row_sizes.last_offset(self.data_rows, view), self.frozen_rows)
+
+    def last_col_offset(self):
+        """get the largest offset_x, showing the last column in full"""
+        view = self.view_width - self.frozen_size()[0]
+        return max(self.col_sizes.last_offset(self.data_cols, view), self.frozen_cols)
+
+    def _fit_visible(self):
+        """count the rows and columns in view at the current offsets and
+        shifts, plus the overscan, and schedule the on-screen grids to
+        be resized to them and placed, see _layout_grids. The number
+        varies with the offsets when sizes vary.
         """
-        ystart = self.offset_x / self.data_rows
-        yend = (self.visible_rows + self.offset_x) / self.data_rows
-        xstart = self.offset_y / self.data_cols
-        xend = (self.visible_cols + self.offset_y) / self.data_cols
-        self.vsb.set(ystart, yend)
-        self.hsb.set(xstart, xend)
+        frozen_w, frozen_h = self.frozen_size()
+        rows = self.row_sizes.count(self.offset_y, self.view_height - frozen_h + self.shift_y)
+        cols = self.col_sizes.count(self.offset_x, self.view_width - frozen_w + self.shift_x)
+        self.visible_rows = rows + self.overscan if rows else 0
+        self.visible_cols = cols + self.overscan if cols else 0
+        self.schedule_redraw(layout=True)
+
+    def _layout_grids(self):
+        """resize the on-screen grids to visible_rows and visible_cols,
+        and place them. Each grid is resized in one pass, see
+        Cells.resize.
+        """
+        self.row_header.resize(self.visible_rows, 1)
+        self.col_header.resize(1, self.visible_cols)
+        self.table.resize(self.visible_rows, self.visible_cols)
+        if self.frozen_top:
+            self.frozen_top.resize(self.frozen_rows, self.visible_cols)
+            self.frozen_left.resize(self.visible_rows, self.frozen_cols)
+            self.frozen_corner.resize(self.frozen_rows, self.frozen_cols)
+            self.frozen_row_header.resize(self.frozen_rows, 1)
+            self.frozen_col_header.resize(1, self.frozen_cols)
+            if self.backend == 'canvas':
+                self._stack_panes()    # over the cells created since
+        if self.footer_pane and self.footer:
+            footer_rows = len(self.footer)
+            self.footer_pane.resize(footer_rows, self.visible_cols)
+            self.frozen_footer.resize(footer_rows if self.frozen_cols else 0, self.frozen_cols)
+
+        # the table frame holds the overscan too, beyond the view
+        width = self.col_sizes.offset(self.offset_x + self.visible_cols) - self.col_sizes.offset(self.offset_x)
+        height = self.row_sizes.offset(self.offset_y + self.visible_rows) - self.row_sizes.offset(self.offset_y)
+        size = (max(width, self.view_width), max(height, self.view_height))
+        if size != self.grid_size:
+            self.grid_size = size
+            self.table.configure(width=size[0], height=size[1])
+        self._place_grid()
+
+    def set_row_height(self, row, height=None):
+        """set the height in pixels of <row> of the backing store, None
+        for the default. Entry cells are at least a line high.
+        """
+        if height is None:
+            self.row_heights.pop(row, None)
+        else:
+            self.row_heights[row] = height
+        if self.row_index is None:
+            self.row_sizes.set(row, height)
+        else:
+            self._rebuild_row_sizes()
+        self._sizes_changed()
+
+    def col_width_changed(self, col):
+        """note a change to the width of <col> of the backing store"""
+        self.col_sizes.set(col, self.column_width(col) + 1)
+        self._sizes_changed()
 
+    def _sizes_changed(self):
+        if self.view_width:
+            self._resync()
+            self.redraw_panes()
+
+    def _rebuild_row_sizes(self):
+        """lay out the row heights of the backing store in view order"""
+        heights = self.row_heights
+        if self.row_index is None:
+            self.row_sizes.reset(heights.items())
+        else:
+            self.row_sizes.reset((i, heights[row]) for i, row in enumerate(self.row_index)
+                                 if row in heights)
+
+    @timed('resync')
     def _resync(self):
         """resync visible area to the backing store, when either visible
         area changes size or the backing store changes size.
@@ -224,53 +804,32 @@ class TableFrame(tk.Frame):
         1. Insert/delete rows/columns as visible area increases/decreases;
         2. When reaching the last backing rows/columns, adjusting offset 
         instead; 
-        3. When the backing store is smaller than visible area, 
-        filling empty cells/values to visible area/the backing store.
+        3. When the backing store is smaller than visible area, the cells
+        out of the backing store are shown empty.
         """
 
-        rows = self.visible_rows
-        cols = self.visible_cols
-
-        if cols + self.offset_x > len(self.data[0]):
-            if len(self.data[0]) - cols >= 0:
-                self.offset_x = len(self.data[0]) - cols
-            else:
-                #self.col_header.set_col_count(cols)
-                for i in range(len(self.data)):
-                    if self.data[i]:
-                        self.data[i].extend([None]*(cols - len(self.data[i])))
-
-        if rows + self.offset_y > len(self.data):
-            if len(self.data) - rows >= 0:
-                self.offset_y = len(self.data) - rows
-            else:
-                #self.row_header.set_row_count(rows)
-                self.data.extend([None]*(rows - len(self.data)))
+        if self.offset_x >= self.last_col_offset():
+            self.offset_x = self.last_col_offset()
+            self.shift_x = 0
+        if self.offset_y >= self.last_row_offset():
+            self.offset_y = self.last_row_offset()
+            self.shift_y = 0
+        self.offset_x = max(self.offset_x, self.frozen_cols)
+        self.offset_y = max(self.offset_y, self.frozen_rows)
 
-        self.resize_row(rows)
-        self.resize_col(cols)
+        self._fit_visible()
         self.reset_scrollbars()
 
+    @timed('configure')
     def on_frame_configure(self, event):
         """Reset the scroll region to encompass the inner frame"""
-        self.table.lift(self.canvas)
-        self.row_header.lift(self.rh_canvas)
-        self.col_header.lift(self.ch_canvas)
-        self.table.lower(self.rh_canvas)
-        self.table.lower(self.ch_canvas)
-        self.canvas.lower(self.vsb)
-        self.canvas.lower(self.hsb)
-        self.vsb.lift(self.col_header)
-        self.hsb.lift(self.row_header)
-
-        cell_w, cell_h = self.cell_geometry()
-        self.visible_cols = int(event.width / cell_w) + 1
-        self.visible_rows = int(event.height / cell_h) + 1
-
-        if self.data:
-            self.data_rows = len(self.data)
-        if self.data and self.data[0]:
-            self.data_cols = len(self.data[0])
+        self._stack_panes()
+
+        self.view_width = event.width
+        self.view_height = event.height
+
+        self.data_rows = self.view_row_count()
+        self.data_cols = self.model.col_count()
 
         self._resync()
 
@@ -279,8 +838,8 @@ class TableFrame(tk.Frame):
 
         self.canvas.grid(column=1, row=1, sticky='nsew')
         self.vsb.grid(column=2, row=1, sticky='ns')
-        self.hsb.grid(column=1, row=2, sticky='ew')
-        self.table.configure(width=event.width, height=event.height)
+        # under the footer once there is one, see set_footer
+        self.hsb.grid(column=1, row=2 if self.footer_pane is None else 3, sticky='ew')
 
         self.table.grid_propagate(0) # force the widget size regardless of its content
         self.after_idle(self.release_grab) # release grab in case locked
@@ -319,8 +878,10 @@ class TableFrame(tk.Frame):
 
         self.clear_selection()
 
+        gr, gc = self.table.grid_origin     # see Cells._rotate
         row, col = self.table.grid_location(x1, y1)
         row2, col2 = self.table.grid_location(x2, y2)
+        row, col, row2, col2 = row - gr, col - gc, row2 - gr, col2 - gc
         self.selected_row = row
         self.selected_col = col
         self.selected_row2 = row2
@@ -350,7 +911,7 @@ class TableFrame(tk.Frame):
 
     def delete_row(self, pos, count):
         self.row_header.delete_row(pos, count)
-        self.table.delete_col(pos, count)
+        self.table.delete_row(pos, count)
 
     def delete_col(self, pos, count):
         self.col_header.delete_col(pos, count)
@@ -387,81 +948,674 @@ class TableFrame(tk.Frame):
     def count_col(self):
         return self.col_header.count_col()
 
+    def make_model(self, data, data_rows=0, data_cols=0):
+        """get the TableModel for data, wrapping a list of rows"""
+        if isinstance(data, TableModel):
+            return data
+        return ListTableModel(data, data_rows, data_cols)
+
+    @timed('set_data')
     def set_data(self, data, data_rows=0, data_cols=0, offset_x=0, offset_y=0):
         """set backing store for the table.
 
-        data format:
-        data is a list of rows, each of rows is a list of cells, each cell
-        is either a value or a dict which contains cell value and cell
-        attributes. A row or a cell could be None. The trailing Nones 
-        could be omitted for columns or rows, in which case data_rows and/
-        or data_cols should be specified. This is a trade-off for space and
-        time efficiency for daily use-cases.
-
-        Cell dict has the following keys which have internal keys to save
-        space for large data set:
+        data is either a TableModel or a list of rows, see ListTableModel
+        for the list format. data_rows and data_cols are the minimum
+        size of a list of rows whose trailing Nones are omitted.
 
-        keys = ['value', 'font', 'align', 'bg', 'fg', 'width', 'height',
-                'state', 'background', 'foreground', 'justify']
-        ikeys = ['v', 'ft', 'a', 'b', 'f', 'w', 'h',
-                 's', 'b', 'f', 'a']
-
-        Other keys supported by Entry Widget or Text Widget are transferred
-        to the cell widget. However width/height are pixels which would be
-        transformed to characters/lines for Entry Widget/Text Widget.
-
-        offset_x: the starting row offset to be displayed
-        offset_y: the starting column offset to be displayed
+        offset_x: the starting column offset to be displayed
+        offset_y: the starting row offset to be displayed
         """
 
-        self.data_rows = max(data_rows, len(data)) if data else data_rows
-
-        self.data_cols = max([len(data[i]) for i in range(self.data_rows) if data[i]])
-        self.data_cols = max(self.data_cols, data_cols)
+        model = self.make_model(data, data_rows, data_cols)
+        self.data_rows = model.row_count()
+        self.data_cols = model.col_count()
 
-        if offset_x < 0:
-            offset_x = 0
-        if offset_y < 0:
-            offset_y = 0
+        if offset_x < self.frozen_cols:
+            offset_x = self.frozen_cols
+        if offset_y < self.frozen_rows:
+            offset_y = self.frozen_rows
         if offset_y >= self.data_rows:
-            offset_y = self.data_rows - 1
+            offset_y = max(0, self.data_rows - 1)
         if offset_x >= self.data_cols:
-            offset_x = self.data_cols - 1
-
+            offset_x = max(0, self.data_cols - 1)
+
+        self.model = model
+        self.clear_style_cache()
+        self.row_index = None
+        self.sort_order = []
+        self.sort_cache = {}
+        self.filters = {}
+        self.filter_index = None
+        self.filter_generation += 1
+        self.matches = []
+        self.current_match = None
+        self.find_index = None
+        self.find_generation += 1
+        self.row_heights = {}
+        self.row_sizes.reset()
+        if self.footer:
+            self.aggregates = ColumnAggregates(model)
         self.data = data
         self.table.data = data
         self.canvas.data = data
 
         self.offset_x = offset_x
         self.offset_y = offset_y
+        self.shift_x = 0
+        self.shift_y = 0
 
-        if not self.table.cells:
-            for i in range(self.visible_cols):
-                self.insert_col(i)
+        # the grids are built or resized in the redraw pass, once
+        self._resync()
+        self.redraw_panes()
+
+    poll_interval = 100 # ms
+    polled_model = None
+    progress_callback = None
+    def set_progress_callback(self, callback):
+        """call callback(progress) with the progress from 0.0 to 1.0 of
+        a model loading in the background, see TableModel.loading.
+        """
+        self.progress_callback = callback
+
+    def watch_model(self):
+        """follow the model while it is loading in the background"""
+        model = self.model
+        if model is not self.polled_model and model.loading():
+            self.polled_model = model
+            self.after(self.poll_interval, self._poll_model, model)
+
+    @timed('poll')
+    def _poll_model(self, model):
+        """follow a model growing in the background"""
+        if model is not self.model:
+            return  # replaced by set_data
+
+        loading = model.loading()
+        data_rows = self.view_row_count()
+        data_cols = model.col_count()
+        if data_rows != self.data_rows or data_cols != self.data_cols:
+            in_view = (self.data_rows < self.offset_y + self.visible_rows
+                       or self.data_cols < self.offset_x + self.visible_cols)
+            self.data_rows = data_rows
+            self.data_cols = data_cols
+            self.reset_scrollbars()
+            if in_view:
+                self.refresh_block(0, data_rows, 0, data_cols)
+            if self.aggregates is not None:
+                self.aggregates.extend()
+                self.refresh_footer()
+
+        for block in model.changes():
+            self.refresh_block(*block)
+
+        if self.progress_callback:
+            self.progress_callback(model.progress())
+        if loading:
+            self.after(self.poll_interval, self._poll_model, model)
+        else:
+            self.polled_model = None
 
-            for j in range(self.visible_rows):
-                self.insert_row(j)
+    @timed('refresh')
+    def refresh_block(self, r0, r1, c0, c1):
+        """redraw the on-screen cells of rows r0..r1-1 and columns
+        c0..c1-1 of the backing store, after they changed.
+        """
+        for pane in self.panes:
+            if isinstance(pane.data, str):
+                continue    # a header
+            if self.row_index is not None or pane in self.dirty:
+                # the rows may be anywhere in the view, or the pane shows
+                # other offsets than it will
+                self.schedule_redraw([pane])
+                continue
+            row, col = pane.origin()
+            row0 = max(r0 - row, 0)
+            row1 = min(r1 - row, pane.count_row())
+            col0 = max(c0 - col, 0)
+            col1 = min(c1 - col, pane.count_col())
+            if row0 < row1 and col0 < col1:
+                pane.redraw_region(row0, row1, col0, col1)
+
+    #The following methods operate on the view of the backing store
+
+    def model_row(self, row):
+        """get the backing store row shown at row <row> of the view"""
+        index = self.row_index
+        if index is None:
+            return row
+        return index[row] if row < len(index) else self.model.row_count() + row
+
+    def view_row_count(self):
+        index = self.row_index
+        return self.model.row_count() if index is None else len(index)
+
+    @timed('fetch')
+    def get_view_block(self, r0, r1, c0, c1):
+        """get (values, style ids) of rows r0..r1-1 of the view and
+        columns c0..c1-1, as TableModel.get_block/get_style_block.
+        """
+        model = self.model
+        index = self.row_index
+        if index is None:
+            return model.get_block(r0, r1, c0, c1), model.get_style_block(r0, r1, c0, c1)
+
+        # fetch the backing store rows in runs of consecutive rows
+        rows = index[r0:r1]
+        values = []
+        style_ids = []
+        found = False
+        i = 0
+        while i < len(rows):
+            j = i + 1
+            while j < len(rows) and rows[j] == rows[j - 1] + 1:
+                j += 1
+            values.extend(model.get_block(rows[i], rows[j - 1] + 1, c0, c1))
+            ids = model.get_style_block(rows[i], rows[j - 1] + 1, c0, c1)
+            if ids is None:
+                style_ids.extend([0] * (c1 - c0) for k in range(j - i))
+            else:
+                style_ids.extend(ids)
+                found = True
+            i = j
+        values.extend([None] * (c1 - c0) for k in range(r1 - r0 - len(rows)))
+        style_ids.extend([0] * (c1 - c0) for k in range(r1 - r0 - len(rows)))
+        return values, style_ids if found else None
+
+    def col_label(self, col):
+        """get the column header text of <col>, marked if sorted by"""
+        for col_, descending in self.sort_order:
+            if col_ == col:
+                return '%d %s' % (col, '▼' if descending else '▲')
+        return col
+
+    def on_col_header_click(self, col, add=False):
+        """sort by the clicked column <col> of the view: ascending,
+        descending, unsorted. With add (shift-click) the column is a
+        further sort key.
+        """
+        order = self.sort_order
+        current = dict(order).get(col)
+        if add:
+            order = [key for key in order if key[0] != col]
+            if current is None:
+                order.append((col, False))
+            elif not current:
+                order.append((col, True))
+        elif current is None or len(order) > 1:
+            order = [(col, False)]
+        elif not current:
+            order = [(col, True)]
+        else:
+            order = []
+        self.sort(order)
 
-            for i in range(self.visible_rows):
-                for j in range(self.visible_cols):
-                    ix = i + self.offset_x
-                    iy = j + self.offset_y
-                    if self.data and self.data[ix] and self.data[ix][iy]:
-                        self.set_value(i, j, self.data[ix][iy])
+    def sort(self, order):
+        """sort the view by order, a list of (col, descending) with the
+        primary key first, or a column.
 
-            for i in range(self.visible_rows):
-                self.set_row_header(i, i+self.offset_y)
+        Only a permutation of the rows is computed, stable and from sort
+        keys cached per column, vectorized for numeric columns of an
+        ArrayTableModel. The backing store is not reordered, so sorting
+        again or clearing the sort is cheap.
+        """
+        if isinstance(order, int):
+            order = [(order, False)]
+        self.sort_order = list(order)
+        self._rebuild_view()
 
-            for j in range(self.visible_cols):
-                self.set_col_header(j, j+self.offset_x)
+    def clear_sort(self):
+        self.sort([])
 
-            self.reset_scrollbars()
+    def _rebuild_view(self):
+        if self.sort_order:
+            self.row_index = self._sorted_index(self.filter_index)
         else:
-            self._resync()
+            self.row_index = self.filter_index
+        if self.row_heights:
+            self._rebuild_row_sizes()
+
+        self.data_rows = self.view_row_count()
+        self._resync()
+        self.redraw_panes()
+
+    def _sort_column(self, col):
+        """get the sort keys of <col> for all backing store rows"""
+        keys = self.sort_cache.get(col)
+        if keys is None:
+            keys = self.model.get_column(col)
+            if np is None or not isinstance(keys, np.ndarray) or keys.dtype.kind not in 'biuf':
+                keys = [sort_key(v) for v in keys]
+            self.sort_cache[col] = keys
+        return keys
+
+    def _sorted_index(self, rows=None):
+        """get rows, all backing store rows by default, in sort order"""
+        keys = [(self._sort_column(col), descending) for col, descending in self.sort_order]
+
+        if np is not None and all(isinstance(k, np.ndarray) for k, d in keys):
+            if rows is not None:
+                rows = np.array(rows, dtype=np.int64)
+            columns = []
+            for k, descending in reversed(keys):   # lexsort's primary key is last
+                if rows is not None:
+                    k = k[rows]
+                if descending:
+                    k = -k if k.dtype.kind == 'f' else -k.astype(np.int64)
+                columns.append(k)
+            index = np.lexsort(columns)
+            if rows is not None:
+                index = rows[index]
+            return array('I', index.astype(np.uint32).tobytes())
+
+        index = list(range(self.model.row_count()) if rows is None else rows)
+        for k, descending in reversed(keys):
+            index.sort(key=k.__getitem__, reverse=descending)
+        return array('I', index)
+
+    filter_chunk = 65536    # rows evaluated at a time
+    def set_filter(self, filters, vectorized=False, callback=None):
+        """show only the rows whose cells pass filters, {col: predicate}.
+
+        The view is an array of the passing backing store rows, the data
+        is not copied. Predicates take a cell value and return whether
+        it passes, evaluated a chunk of rows at a time on a worker
+        thread. If vectorized, they take an ndarray of a chunk of the
+        column and return a boolean array, and are evaluated right away.
+        callback() is called once the filter shows.
+
+        A changed cell only rechecks its own row against the filter.
+        """
+        self.filters = dict(filters)
+        self.filter_vectorized = vectorized
+        self.filter_generation += 1
+        generation = self.filter_generation
+        if not filters:
+            self._set_filter_index(None, callback)
+        elif vectorized:
+            self._set_filter_index(self._filter_rows(generation), callback)
+        else:
+            done = queue.Queue(1)
+            threading.Thread(target=lambda: done.put(self._filter_rows(generation)),
+                             daemon=True).start()
+            self.after(self.poll_interval, self._poll_filter, generation, done, callback)
+
+    def clear_filter(self):
+        self.set_filter({})
+
+    def _poll_filter(self, generation, done, callback):
+        if generation != self.filter_generation:
+            return  # superseded
+        try:
+            index = done.get_nowait()
+        except queue.Empty:
+            self.after(self.poll_interval, self._poll_filter, generation, done, callback)
+            return
+        self._set_filter_index(index, callback)
+
+    def _set_filter_index(self, index, callback=None):
+        self.filter_index = index
+        self._rebuild_view()
+        if callback:
+            callback()
+
+    def _filter_rows(self, generation):
+        """get the backing store rows passing self.filters"""
+        model = self.model
+        filters = self.filters
+        vectorized = self.filter_vectorized
+        rows = model.row_count()
+        index = array('I')
+        for r0 in range(0, rows, self.filter_chunk):
+            if generation != self.filter_generation:
+                return None     # superseded
+            r1 = min(r0 + self.filter_chunk, rows)
+            if vectorized:
+                mask = np.ones(r1 - r0, dtype=bool)
+                for col, predicate in filters.items():
+                    mask &= np.asarray(predicate(np.asarray(model.get_column(col, r0, r1))), dtype=bool)
+                index.extend(r0 + i for i in np.flatnonzero(mask).tolist())
+            else:
+                columns = [(model.get_column(col, r0, r1), predicate)
+                           for col, predicate in filters.items()]
+                index.extend(r0 + i for i in range(r1 - r0)
+                             if all(predicate(values[i]) for values, predicate in columns))
+        return index
+
+    def _row_passes(self, row):
+        model = self.model
+        for col, predicate in self.filters.items():
+            value = model.get_column(col, row, row + 1)
+            if self.filter_vectorized:
+                if not np.asarray(predicate(np.asarray(value)), dtype=bool)[0]:
+                    return False
+            elif not predicate(value[0]):
+                return False
+        return True
+
+    def _recheck_row(self, row):
+        """add or remove a changed row to or from the filtered view"""
+        index = self.filter_index
+        passes = self._row_passes(row)
+        i = bisect.bisect_left(index, row)
+        present = i < len(index) and index[i] == row
+        if passes == present:
+            return
 
-        self.table.redraw()
-        self.row_header.redraw()
-        self.col_header.redraw()
+        if passes:
+            index.insert(i, row)
+        else:
+            del index[i]
+        if self.row_index is not index:    # sorted: keep the row in place
+            if passes:
+                self.row_index.append(row)
+            else:
+                self.row_index.remove(row)
+        if self.row_heights:
+            self._rebuild_row_sizes()
+
+        self.data_rows = self.view_row_count()
+        self._resync()
+        self.redraw_panes(cols=False)
+
+    find_chunk = 65536      # cells scanned at a time
+    def find(self, pattern, mode='substring', ignore_case=False, callback=None):
+        """find the cells of the backing store matching pattern, see
+        Matcher for the modes.
+
+        The backing store is scanned a chunk at a time on a worker
+        thread, waiting for the cells of a loading model to arrive, and
+        under any TileCache. Matches, (row, col) of the backing store in row-major
+        order, are collected in self.matches and streamed to
+        callback(matches, done) as they are found. With a find index,
+        see build_find_index, the worker searches the index instead.
+        """
+        matcher = Matcher(pattern, mode, ignore_case)
+        self.find_generation += 1
+        self.matches = []
+        self.current_match = None
+
+        generation = self.find_generation
+        found = queue.Queue()
+        if self.find_index is not None:
+            target = self._find_in_index
+            args = (self.find_index, matcher, generation, found)
+        else:
+            target = self._find_scan
+            args = (matcher, generation, found)
+        threading.Thread(target=target, args=args, daemon=True).start()
+        self.after(self.poll_interval, self._poll_find, generation, found, callback)
+
+    def _scan_model(self):
+        """get the model for a background scan, the one under any
+        TileCache, so that the scan does not evict the tiles in view.
+        """
+        model = self.model
+        while isinstance(model, TileCache):
+            model = model.model
+        return model
+
+    def _find_scan(self, matcher, generation, found):
+        model = self._scan_model()
+        rows, cols = model.row_count(), model.col_count()
+        by_column = type(model).get_column is not TableModel.get_column
+        chunk = max(self.find_chunk // max(cols, 1), 1)
+        for r0 in range(0, rows, chunk):
+            r1 = min(r0 + chunk, rows)
+            while True:
+                if generation != self.find_generation:
+                    return  # superseded
+                if by_column:
+                    columns = [model.get_column(col, r0, r1) for col in range(cols)]
+                else:
+                    block = model.get_block(r0, r1, 0, cols)
+                    columns = list(zip(*block)) if block else []
+                if not (model.loading()
+                        and any(value is LOADING for values in columns for value in values)):
+                    break
+                time.sleep(self.poll_interval / 1000)   # for the blocks requested
+            matches = sorted((r0 + i, col) for col, values in enumerate(columns)
+                             for i in matcher.search(values))
+            if matches:
+                found.put(matches)
+        found.put(None)
+
+    def _find_in_index(self, index, matcher, generation, found):
+        matches = index.search(matcher)
+        if generation != self.find_generation:
+            return  # superseded
+        if matches:
+            found.put(matches)
+        found.put(None)
+
+    def _poll_find(self, generation, found, callback):
+        if generation != self.find_generation:
+            return  # superseded
+        done = False
+        matches = []
+        while not done:
+            try:
+                batch = found.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                done = True
+            else:
+                matches.extend(batch)
+        self.matches.extend(matches)
+        if callback and (matches or done):
+            callback(matches, done)
+        if not done:
+            self.after(self.poll_interval, self._poll_find, generation, found, callback)
+
+    def build_find_index(self, callback=None):
+        """index the backing store on a worker thread for repeated find()
+        calls, see FindIndex. callback() is called when it is ready. The
+        index is dropped when the data changes.
+        """
+        self.find_index = None
+        model = self.model
+        done = queue.Queue(1)
+        scan_model = self._scan_model()
+        threading.Thread(target=lambda: done.put(FindIndex(scan_model)), daemon=True).start()
+        self.after(self.poll_interval, self._poll_find_index, model, done, callback)
+
+    def _poll_find_index(self, model, done, callback):
+        if model is not self.model:
+            return  # replaced by set_data
+        try:
+            self.find_index = done.get_nowait()
+        except queue.Empty:
+            self.after(self.poll_interval, self._poll_find_index, model, done, callback)
+            return
+        if callback:
+            callback()
+
+    def _match_positions(self):
+        """the matches found so far as view (row, col), in view order"""
+        if self.row_index is None:
+            return self.matches
+        cached = self.__dict__.get('_match_view')
+        if cached and cached[0] is self.row_index and cached[1] == len(self.matches):
+            return cached[2]
+        view_row = {row: i for i, row in enumerate(self.row_index)}
+        positions = sorted((view_row[row], col) for row, col in self.matches if row in view_row)
+        self._match_view = (self.row_index, len(self.matches), positions)
+        return positions
+
+    def find_next(self, backward=False):
+        """scroll to the next match, or the previous one if backward,
+        wrapping around. Return its view (row, col), or None if there is
+        no match (yet).
+        """
+        positions = self._match_positions()
+        if not positions:
+            return None
+        current = self.current_match or (self.offset_y, -1)
+        if backward:
+            i = bisect.bisect_left(positions, current) - 1
+        else:
+            i = bisect.bisect_right(positions, current)
+            if i == len(positions):
+                i = 0
+        self.current_match = positions[i]
+        self.scroll_to(*self.current_match)
+        return self.current_match
+
+    def _in_view(self, sizes, index, offset, shift, view):
+        """whether row or column index is shown in full in a view of view
+        pixels from offset, shift pixels into it. The overscan and rows
+        or columns cut by an edge of the view are not.
+        """
+        start = sizes.offset(offset) + shift
+        return sizes.offset(index) >= start and sizes.offset(index + 1) <= start + view
+
+    def scroll_to(self, row, col):
+        """scroll view row and col into view, if they are not in view"""
+        offset_y, offset_x = self.offset_y, self.offset_x
+        frozen_w, frozen_h = self.frozen_size()
+        if not (row < self.frozen_rows or self._in_view(
+                self.row_sizes, row, offset_y, self.shift_y, self.view_height - frozen_h)):
+            offset_y = max(min(row, self.last_row_offset()), self.frozen_rows)
+        if not (col < self.frozen_cols or self._in_view(
+                self.col_sizes, col, offset_x, self.shift_x, self.view_width - frozen_w)):
+            offset_x = max(min(col, self.last_col_offset()), self.frozen_cols)
+        if (offset_y, offset_x) != (self.offset_y, self.offset_x):
+            self.offset_y = offset_y
+            self.offset_x = offset_x
+            self.shift_y = 0
+            self.shift_x = 0
+            self._fit_visible()
+            self.reset_scrollbars()
+            self.redraw_panes(scrolled=True)
+
+    def iter_export(self, region=None, view=True, styles=False, chunk_rows=4096):
+        """yield the rows of a region (r0, r1, c0, c1), the whole table by
+        default, each a list of cell values, or with styles a pair of
+        lists (values, attrs) with the resolved attrs, in tk keys, and
+        the default values of empty cells. Rows are of the view, sorted
+        and filtered, or of the backing store if not view. The data is
+        fetched chunk_rows at a time. Loading cells are exported empty.
+        """
+        for chunk in self._export_chunks(region, view, styles, chunk_rows):
+            yield from chunk
+
+    def _export_chunks(self, region, view, styles, chunk_rows):
+        model = self.model
+        rows = self.view_row_count() if view else model.row_count()
+        r0, r1, c0, c1 = region or (0, None, 0, None)
+        r1 = rows if r1 is None else min(r1, rows)
+        c1 = model.col_count() if c1 is None else min(c1, model.col_count())
+        if styles:
+            resolve = self.resolve_style
+            row_style = self.row_header.row_style
+            col_styles = [self.col_header.col_style(c) for c in range(c0, c1)]
+
+        for start in range(r0, r1, chunk_rows):
+            end = min(start + chunk_rows, r1)
+            if view:
+                values, style_ids = self.get_view_block(start, end, c0, c1)
+            else:
+                values = model.get_block(start, end, c0, c1)
+                style_ids = model.get_style_block(start, end, c0, c1) if styles else None
+            chunk = []
+            for i, row in enumerate(values):
+                row = [None if value is LOADING else value for value in row]
+                if styles:
+                    rid = row_style(self.model_row(start + i) if view else start + i)
+                    attrs = []
+                    for j, value in enumerate(row):
+                        default, cell_attrs = resolve('table', rid, col_styles[j],
+                                                      style_ids[i][j] if style_ids else 0)
+                        if value is None:
+                            row[j] = default
+                        attrs.append(cell_attrs)
+                    row = (row, attrs)
+                chunk.append(row)
+            yield chunk
+
+    export_formats = ('csv', 'tsv', 'jsonl')
+    def export(self, file, format='csv', region=None, view=True, styles=False,
+               chunk_rows=4096, encoding='utf-8'):
+        """write the table, see iter_export, to file, a path or a text
+        file, as 'csv', 'tsv' or JSON Lines 'jsonl', a chunk of rows at a
+        time. A JSON line is the list of the values of a row, or with
+        styles {"values": [...], "attrs": [...]}; styles are only
+        exported to JSON Lines.
+
+        Return the stats {'rows', 'cells', 'chars', 'seconds',
+        'fetch_seconds', 'format_seconds', 'write_seconds',
+        'cells_per_second'}, where fetching the rows from the model vs
+        formatting vs writing tells where export spends its time.
+        """
+        if format not in self.export_formats:
+            raise ValueError("unknown export format %r" % (format,))
+        if styles and format != 'jsonl':
+            raise ValueError("styles are only exported to 'jsonl'")
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, 'w', encoding=encoding, newline='') as f:
+                return self.export(f, format, region, view, styles, chunk_rows)
+
+        stats = dict(rows=0, cells=0, chars=0, fetch_seconds=0.0, format_seconds=0.0,
+                     write_seconds=0.0)
+        start = time.perf_counter()
+        chunks = self._export_chunks(region, view, styles, chunk_rows)
+        while True:
+            t = time.perf_counter()
+            chunk = next(chunks, None)
+            t0 = time.perf_counter()
+            stats['fetch_seconds'] += t0 - t
+            if chunk is None:
+                break
+            buffer = io.StringIO()
+            if format == 'jsonl':
+                for row in chunk:
+                    if styles:
+                        row = {'values': row[0], 'attrs': row[1]}
+                    buffer.write(json.dumps(row, default=str))
+                    buffer.write('\n')
+            else:
+                writer = csv.writer(buffer, delimiter='\t' if format == 'tsv' else ',',
+                                    lineterminator='\n')
+                writer.writerows(chunk)
+            text = buffer.getvalue()
+            t1 = time.perf_counter()
+            file.write(text)
+            t2 = time.perf_counter()
+
+            stats['rows'] += len(chunk)
+            stats['cells'] += sum(len(row[0] if styles else row) for row in chunk)
+            stats['chars'] += len(text)
+            stats['format_seconds'] += t1 - t0
+            stats['write_seconds'] += t2 - t1
+
+        stats['seconds'] = seconds = time.perf_counter() - start
+        stats['cells_per_second'] = stats['cells'] / seconds if seconds else 0.0
+        return stats
+
+    def import_file(self, path, format=None, wait=0.1, **kwargs):
+        """show a CSV, TSV or JSON Lines file while it loads on a
+        background thread, see ImportTableModel. The first batch of rows
+        is waited for, up to wait seconds, so the first screen has data.
+        Return the model.
+        """
+        model = ImportTableModel(path, format, **kwargs)
+        model.ready.wait(wait)
+        self.set_data(model)
+        return model
+
+    def data_changed(self, row, col, old=None):
+        """note a change to a cell of the backing store, whose value was
+        old before.
+        """
+        self.sort_cache.pop(col, None)
+        self.find_index = None
+        if self.filter_index is not None and col in self.filters:
+            self._recheck_row(row)
+        if self.aggregates is not None:
+            new = self.model.get_column(col, row, row + 1)[0]
+            self.aggregates.update(col, old, new)
+            self.refresh_footer(col)
+        self.refresh_block(row, row + 1, col, col + 1)
 
     #The following methods operate on backing store
 
@@ -487,10 +1641,10 @@ class TableFrame(tk.Frame):
         pass
 
     def count_data_row(self):
-        pass
+        return self.model.row_count()
 
     def count_data_col(self):
-        pass
+        return self.model.col_count()
 
     dummy_cell = None
     CELL_WIDTH = 5 # 5 characters
@@ -509,6 +1663,37 @@ class TableFrame(tk.Frame):
 
         return (self.dummy_cell.winfo_reqwidth(), self.dummy_cell.winfo_reqheight())
 
+    cell_options = None
+    def cell_option(self, key):
+        """get the default of a cell option, in tk keys"""
+        if self.cell_options is None:
+            self.cell_options = {}
+        if key not in self.cell_options:
+            self._dummy_cell()
+            tk_key = {'bg': 'background', 'fg': 'foreground'}.get(key, key)
+            self.cell_options[key] = self.dummy_cell.cget(tk_key)
+        return self.cell_options[key]
+
+    char_pixels = None
+    def char_width(self):
+        """get the average width in pixels of a character in a cell"""
+        if self.char_pixels is None:
+            self.char_pixels = tkfont.Font(font=self.cell_option('font')).measure('0')
+        return self.char_pixels
+
+    def column_width(self, col):
+        """get the width in pixels of <col> of the backing store, from
+        the table default and col_defaults widths in characters.
+        """
+        chars = self.default.get('w', self.CELL_WIDTH)
+        chars = self.styles.get(self.col_header.col_style(col)).get('w', chars)
+        return self.chars_width(chars)
+
+    def chars_width(self, chars):
+        """get the width in pixels of an Entry cell <chars> wide"""
+        cell_w = self.cell_geometry()[0]
+        return cell_w + (int(chars) - self.CELL_WIDTH) * self.char_width()
+
     def cell_options_default(self):
         self._dummy_cell()
         options_default = self.dummy_cell.configure()
@@ -531,67 +1716,65 @@ class MyCanvas(tk.Canvas):
 
         self.master = master
         self.data = self.master.data
+        self.panes = []     # CanvasCells drawn on it, the topmost last
+        self.instruments = master.instruments
 
     def yview(self, event, value, unit=None):
+        master = self.master
         if event == "moveto":
-            self.set_row_offset(int(len(self.master.data) * float(value) + 0.5))
-            ystart = float(value)
-        elif event == "scroll":
+            sizes = master.row_sizes
+            first = sizes.offset(master.frozen_rows)
+            master.move_to_pixel('y', first + float(value) * (sizes.offset(master.data_rows) - first))
+            return
+        master.shift_y = 0  # scrolling by rows snaps to a row
+        if event == "scroll":
             if unit == "units":
-                self.set_row_offset(self.master.offset_y + int(value))
-                ystart = (self.master.offset_y + int(value)) / len(self.master.data)
+                self.set_row_offset(master.offset_y + int(value))
             elif unit == "pages":
-                page_size = self.master.count_row()
-                self.set_row_offset(self.master.offset_y + int(value) * page_size)
-                ystart = (self.master.offset_y + int(value) * page_size) / len(self.master.data)
+                page_size = master.visible_rows - master.overscan
+                self.set_row_offset(master.offset_y + int(value) * page_size)
 
-        yend = ystart + self.master.count_row()/len(self.master.data)
-        self.master.vsb.set(ystart, yend)
+        master._fit_visible()
+        master.reset_scrollbars()
 
     def xview(self, event, value, unit=None):
+        master = self.master
         if event == "moveto":
-            self.set_col_offset(int(len(self.master.data[0]) * float(value) + 0.5))
-            xstart = float(value)
-        elif event == "scroll":
+            sizes = master.col_sizes
+            first = sizes.offset(master.frozen_cols)
+            master.move_to_pixel('x', first + float(value) * (sizes.offset(master.data_cols) - first))
+            return
+        master.shift_x = 0  # scrolling by columns snaps to a column
+        if event == "scroll":
             if unit == "units":
-                self.set_col_offset(self.master.offset_x + int(value))
-                xstart = (self.master.offset_x + int(value)) / len(self.master.data[0])
+                self.set_col_offset(master.offset_x + int(value))
             elif unit == "pages":
-                page_size = self.master.count_col()
-                self.set_col_offset(self.master.offset_x + int(value) * page_size)
-                xstart = (self.master.offset_x + int(value) * page_size) / len(self.master.data[0])
+                page_size = master.visible_cols - master.overscan
+                self.set_col_offset(master.offset_x + int(value) * page_size)
 
-        xend = xstart + self.master.count_col()/len(self.master.data[0])
-        self.master.hsb.set(xstart, xend)
+        master._fit_visible()
+        master.reset_scrollbars()
 
+    @timed('offset')
     def set_row_offset(self, offset):
         # clamp first index
-        page_size = self.master.count_row()
-        if offset < 0 or len(self.master.data) <= page_size:
-            offset = 0
-        elif offset >= len(self.master.data) - page_size:
-            offset = len(self.master.data)-page_size
+        offset = max(min(offset, self.master.last_row_offset()), self.master.frozen_rows)
         if offset != self.master.offset_y:
             # redraw widget
             self.master.offset_y = offset
-            self.master.row_header.redraw()
-            self.master.col_header.redraw()
-            self.master.table.redraw()
+            self.master._fit_visible()
+            self.master.redraw_panes(cols=False, scrolled=True)
 
 
+    @timed('offset')
     def set_col_offset(self, offset):
         # clamp first index
-        page_size = self.master.count_col()
-        if offset < 0 or len(self.master.data[0]) <= page_size:
-            offset = 0
-        elif offset >= len(self.master.data[0]) - page_size:
-            offset = len(self.master.data[0])-page_size
+        offset = max(min(offset, self.master.last_col_offset()), self.master.frozen_cols)
         if offset != self.master.offset_x:
             # redraw widget
             self.master.offset_x = offset
-            self.master.row_header.redraw()
-            self.master.col_header.redraw()
-            self.master.table.redraw()
+            self.master._fit_visible()
+            self.master.redraw_panes(rows=False, scrolled=True)
 
 
     def get_visible_region(self):
@@ -614,10 +1797,23 @@ class Cells(tk.Frame):
         self.configure(background="#d4d4d4")  # Boader color: slightly darker than default
         self._row_count = 0
         self._col_count = 0
+        self.instruments = master.instruments
 
         self.bind('<MouseWheel>', master.on_mouse_scroll)
 
-        self.row_defaults = self.col_defaults = []
+        # the cells are bound through a bindtag of their own, once
+        self.tag = 'cells%d' % id(self)
+        self.bind_class(self.tag, '<MouseWheel>', master.on_mouse_scroll)
+        if data == "col_header":
+            self.bind_class(self.tag, '<Button-1>', self.on_click)
+
+        # style ids of row_defaults/col_defaults, by backing store row/col
+        self.row_defaults = array('I')
+        self.col_defaults = array('I')
+
+        # What each on-screen cell widget last showed, so that redraw only
+        # sends Tk the differences: cell -> [text, attrs in tk keys, (row, col)]
+        self.shown = {}
 
     def count_row(self):
         """Count rows or nodes"""
@@ -630,6 +1826,28 @@ class Cells(tk.Frame):
     def set_row_count(self, count):
         self._row_count = count
 
+    scroll_rows = True  # following offset_y, else showing rows from 0
+    scroll_cols = True  # following offset_x, else showing columns from 0
+    def origin(self):
+        """get the view (row, col) shown at the top left of the grid"""
+        master = self.master
+        return (master.offset_y if self.scroll_rows else 0,
+                master.offset_x if self.scroll_cols else 0)
+
+    def resize(self, rows, cols):
+        """resize the grid to rows x cols cells, deleting before inserting
+        so that no cell is created to be deleted. The new cells of an
+        empty grid are all created in one pass, see _new_cells.
+        """
+        if rows < self._row_count:
+            self.delete_row(rows, self._row_count - rows)
+        if cols < self._col_count:
+            self.delete_col(cols, self._col_count - cols)
+        if cols > self._col_count:
+            self.insert_col(self._col_count, cols - self._col_count)
+        if rows > self._row_count:
+            self.insert_row(self._row_count, rows - self._row_count)
+
     def set_col_count(self, count):
         self._col_count = count
 
@@ -640,21 +1858,11 @@ class Cells(tk.Frame):
         row_defaults are looked up when the cell values/attrs are not 
         found.  <row> is relative to the backing store data origin.
         """
-        if row < self.master.data_rows:
+        if row < self.master.count_data_row():
             d = {}
             d.update(default, **kwargs)
             di = self.master.get_ikeysdict(d)
-
-            if not self.row_defaults:
-                self.row_defaults = [[None] for i in range(row + 1)]
-
-            if len(self.row_defaults) < row:
-                self.row_defaults.extend([[None] for i in range(row-len(self.row_defaults)+1)])
-
-            if not self.row_defaults[row][0]:
-                self.row_defaults[row][0] = {}
-
-            self.row_defaults[row][0].update(di)
+            self._set_defaults(self.row_defaults, row, di)
 
     def set_col_defaults(self, col, default={}, **kwargs):
         """set default cell vaule and cell attributes, 
@@ -663,21 +1871,31 @@ class Cells(tk.Frame):
         col_defaults are looked up when the cell values/attrs are not 
         found.  <col> is relative to the backing store data origin.
         """
-        if col < self.master.data_cols:
+        if col < self.master.count_data_col():
             d = {}
             d.update(default, **kwargs)
             di = self.master.get_ikeysdict(d)
-
-            if not self.col_defaults:
-                self.col_defaults = [None] * (col + 1)
-     
-            if len(self.col_defaults) < col:
-                self.col_defaults.extend([None]*(col-len(self.col_defaults)+1))
-
-            if not self.col_defaults[col]:
-                self.col_defaults[col] = {}
-
-            self.col_defaults[col].update(di)
+            self._set_defaults(self.col_defaults, col, di)
+            if 'w' in di:
+                self.master.col_width_changed(col)
+
+    def _set_defaults(self, ids, i, di):
+        if len(ids) <= i:
+            ids.extend(array('I', [0]) * (i + 1 - len(ids)))
+        sid = self.master.styles.merge(ids[i], di)
+        if sid != ids[i]:
+            ids[i] = sid
+            self.master.clear_style_cache()
+
+    def row_style(self, row):
+        """get the style id of row_defaults for <row>"""
+        ids = self.row_defaults
+        return ids[row] if row < len(ids) else 0
+
+    def col_style(self, col):
+        """get the style id of col_defaults for <col>"""
+        ids = self.col_defaults
+        return ids[col] if col < len(ids) else 0
 
     def _set_cell_value(self, cell, value):
         last_state = cell.cget("state")
@@ -691,71 +1909,149 @@ class Cells(tk.Frame):
 
         (row, col) are relative to the on-screen grid left-top corner.
         """
-        cell = self.cells[row][col]
-        self._set_cell_value(cell, value)
+        self._render(row, col, value, {})
 
     def get_nchars(self, width):
         """get the number of chars for the width in pixels"""
+        master = self.master
+        cell_w = master.cell_geometry()[0]
+        return max(0, master.CELL_WIDTH + (width - cell_w) // master.char_width())
 
     def get_nlines(self, height):
         """get the number of lines for the height in pixels"""
+        font = tkfont.Font(font=self.master.cell_option('font'))
+        return max(1, height // font.metrics('linespace'))
 
     def _set_attrs(self, row, col, attrs):
         """Set attrs to an on-screen grid cell.
 
         (row, col) are relative to the on-screen grid left-top corner.
         """
+        shown = self._shown(self.cells[row][col])
+        self._render(row, col, shown[0], attrs)
+
+    def _shown(self, cell):
+        shown = self.shown.get(cell)
+        if shown is None:
+            shown = self.shown[cell] = ['', {}, None]
+        return shown
+
+    def _render(self, row, col, value, attrs, full=False):
+        """Show value and attrs in an on-screen grid cell, sending Tk only
+        what differs from what the cell already shows.
+
+        (row, col) are relative to the on-screen grid left-top corner.
+        attrs are in tk keys. If full, attrs are the fully resolved cell
+        attributes and any option the cell got earlier but is missing
+        from attrs is reset to the cell default.
+        """
+        cell = self.cells[row][col]
+        shown = self._shown(cell)
+        last = shown[1]
+
+        if 'state' not in last:
+            last['state'] = cell.cget("state")
+        state = attrs.get('state', last['state'])
+
         bg = attrs.get('bg')
-        
         if bg:
-            cell = self.cells[row][col]
-            state = cell.cget("state")
             if state == 'readonly':
-                attrs['readonlybackground'] = bg
+                if attrs.get('readonlybackground') != bg:
+                    attrs = dict(attrs, readonlybackground=bg)
             elif state == 'disabled':
-                attrs['disabledbackground'] = bg
+                if attrs.get('disabledbackground') != bg:
+                    attrs = dict(attrs, disabledbackground=bg)
+
+        conf = {k: v for k, v in attrs.items() if k not in last or last[k] != v}
+
+        reset = []
+        if full:
+            reset = [k for k in last if k not in attrs and k != 'state']
+            for k in reset:
+                conf[k] = self.master.cell_option(k)
+
+        script = self.script
+        updated = bool(conf)
+        text = '' if value is None else str(value)
+        if text != shown[0]:
+            updated = True
+            if last['state'] != 'normal':
+                if script is None:
+                    cell.configure(state="normal")
+                else:
+                    script.append('%s configure -state normal' % cell)
+                conf['state'] = state
+            if script is None:
+                cell.delete(0, tk.END)
+                if text:
+                    cell.insert(0, text)
+            else:
+                script.append('%s delete 0 end' % cell)
+                if text:
+                    script.append('%s insert 0 %s' % (cell, tcl_quote(text)))
+            shown[0] = text
+            last['state'] = 'normal'
+
+        if conf:
+            if script is None:
+                self._config(cell, conf, mode='tk')
+            else:
+                script.append('%s configure %s' % (cell, ' '.join(
+                    '-%s %s' % (k, tcl_quote(v)) for k, v in conf.items())))
+            last.update(conf)
+            for k in reset:
+                del last[k]
+
+        place = (row + self.grid_origin[0], col + self.grid_origin[1])
+        if shown[2] != place:
+            if script is None:
+                cell.grid(row=place[0], column=place[1])
+            else:
+                script.append('grid configure %s -row %d -column %d' % (cell, place[0], place[1]))
+            shown[2] = place
+            updated = True
 
-        self._config(self.cells[row][col], attrs, mode='tk')
+        if updated and self.instruments is not None:
+            self.instruments.count('cells_updated')
 
-    def _fill_empty(self, row, col):
-        if not self.data:
-            self.data.extend([[None]] * (row - len(self.data) + 1))
-            self.data[row].extend([None] * (col-len(self.data[row])+1))
-        elif not self.data[row]:
-            self.data.extend([[None]] * (row - len(self.data) + 1))
-        elif not self.data[row][col]:
-            self.data[row].extend([None] * (col-len(self.data[row])+1))
+    # Batched rendering: collect the Tk commands of a whole redraw into
+    # one Tcl script and evaluate it in a single call, instead of a few
+    # calls per cell.
+    batch = False
+    script = None
+
+    def set_batch(self, batch=True):
+        self.batch = batch
+
+    def _begin(self):
+        if self.batch:
+            self.script = []
+
+    def _flush(self):
+        script = self.script
+        self.script = None
+        if script:
+            self.tk.eval('\n'.join(script))
 
     def _set_data_value(self, row, col, value):
         """Set value to a cell at the backing store.
 
         (row, col) are relative to the backing store origin.
         """
-        self._fill_empty(row, col)
-        c = self.data[row][col]
-        if isinstance(c, dict):
-            c.update(v=value)
-            self.data[row][col] = c
-        else:
-            self.data[row][col] = value
+        master = self.master
+        old = None
+        if master.aggregates is not None:
+            old = master.model.get_column(col, row, row + 1)[0]
+        master.model.set_value(row, col, value)
+        master.data_changed(row, col, old)
 
     def _set_data_attrs(self, row, col, attrs):
         """Set attrs to a cell at the backing store.
 
         (row, col) are relative to the backing store origin.
         """
-        self._fill_empty(row, col)
-        c = self.data[row][col]
-        if isinstance(c, dict):
-            c.update(**attrs)
-            self.data[row][col] = c
-        elif c == None:
-            if attrs:
-                self.data[row][col] = attrs
-        else:
-            if attrs:
-                attrs.update({'v':c})
-                self.data[row][col] = attrs
+        self.master.model.set_attrs(row, col, attrs)
+        self.master.refresh_block(row, row + 1, col, col + 1)
 
     def set_value(self, row, col, value):
         """Set value to an on-screen grid cell and the backing store.
@@ -772,13 +2068,14 @@ class Cells(tk.Frame):
             self._set_value(row, col, value)
 
         if not isinstance(self.data, str):
-            row += self.master.offset_y
-            col += self.master.offset_x
+            r0, c0 = self.origin()
+            row += r0
+            col += c0
 
             if row < self.master.data_rows \
                 and col < self.master.data_cols:
 
-                self._set_data_value(row, col, value)
+                self._set_data_value(self.master.model_row(row), col, value)
 
     def set_data_value(self, row, col, value):
         """Set value to a cell at the backing store.
@@ -788,8 +2085,8 @@ class Cells(tk.Frame):
 
         if not isinstance(self.data, str):
 
-            if row < self.master.data_rows \
-                and col < self.master.data_cols:
+            if row < self.master.count_data_row() \
+                and col < self.master.count_data_col():
 
                 self._set_data_value(row, col, value)
 
@@ -873,8 +2170,8 @@ class Cells(tk.Frame):
             di = self.master.get_ikeysdict(d)
 
             if not isinstance(self.data, str):
-                if row < self.master.data_rows \
-                    and col < self.master.data_cols:
+                if row < self.master.count_data_row() \
+                    and col < self.master.count_data_col():
 
                     self._set_data_attrs(row, col, di)
 
@@ -919,16 +2216,13 @@ class Cells(tk.Frame):
 
         pos = max(min(pos, self._row_count), 0)
 
-        for r in range(count):
-            col = []    # col is empty if self._col_count == 0
-            for c in range(self._col_count):
-                col.append(self._new_cell(text))
-
-            self.cells.insert(pos, col)
+        cols = self._col_count  # rows are empty if 0
+        cells = self._new_cells(count * cols, text)
+        self.cells[pos:pos] = [cells[r * cols:(r + 1) * cols] for r in range(count)]
 
         self._row_count += count
 
-        self.redraw()
+        self.master.schedule_redraw([self])
 
     def insert_col(self, pos, count=1, text=None):
         """Insert empty rows or nodes"""
@@ -940,13 +2234,13 @@ class Cells(tk.Frame):
         if self._row_count == 0:
             pass
         else:
-            for row in self.cells:
-                for col in range(count):
-                    row.insert(pos, self._new_cell(text))
+            cells = self._new_cells(count * self._row_count, text)
+            for r, row in enumerate(self.cells):
+                row[pos:pos] = cells[r * count:(r + 1) * count]
 
         self._col_count += count
 
-        self.redraw()
+        self.master.schedule_redraw([self])
 
     def _config(self, cell, conf, mode='internal'):
         #if isinstance(cell, tk.Entry):
@@ -963,79 +2257,233 @@ class Cells(tk.Frame):
 
     def _new_cell(self, text=None, mode='singleline'):
         if mode == 'singleline':
-            cell = tk.Entry(self)
-        else:
-            cell = tk.Text(self)
+            return self._new_cells(1, text)[0]
+        cell = tk.Text(self)
 
         self._config(cell, self.master.default)
-        cell.grid(padx=(0, 1), pady=(0, 1))
+        self.shown[cell] = ['', self.master.get_keysdict(self.master.default), None]
+        cell.grid(padx=(0, 1), pady=(0, 1), sticky='nsew')
         if text:
-            _set_cell_value(cell, value)
-
-        # Force the widget size regardless of its content. 
-        # TODO: make a customized Entry widget to accomodate multilines
-        # and font/size chanages.
-        # grid_propagate(0) does not contain font changes.
+            self._set_cell_value(cell, text)
+            self.shown[cell][0] = str(text)
         cell.grid_propagate(0)
+        tags = cell.bindtags()
+        cell.bindtags(tags[:1] + (self.tag,) + tags[1:])
 
-        cell.bind("<MouseWheel>", self.master.on_mouse_scroll)
-        cell.tk_focusFollowsMouse()
-
+        if self.instruments is not None:
+            self.instruments.count('cells_created')
         return cell
 
+    def _new_cells(self, count, text=None):
+        """create count Entry cells in one pass: one Tk call creating
+        each, already configured with the defaults, and one script
+        gridding and binding them all.
+        """
+        if count <= 0:
+            return []
+        master = self.master
+        conf = master.get_keysdict(master.default)
+        cells = [tk.Entry(self, **conf) for i in range(count)]
+
+        # Force the widget size regardless of its content.
+        # TODO: make a customized Entry widget to accomodate multilines
+        # and font/size chanages.
+        # grid_propagate(0) does not contain font changes.
+        script = []
+        for cell in cells:
+            self.shown[cell] = ['', dict(conf), None]
+            script.append('grid %s -padx {0 1} -pady {0 1} -sticky nsew' % cell)
+            script.append('grid propagate %s 0' % cell)
+            script.append('bindtags %s [linsert [bindtags %s] 1 %s]' % (cell, cell, self.tag))
+        self.tk.eval('\n'.join(script))
+        if text:
+            for cell in cells:
+                self._set_cell_value(cell, text)
+                self.shown[cell][0] = str(text)
+
+        root = self._root()     # one per Tcl interpreter
+        if not getattr(root, 'focus_follows_mouse', False):
+            cells[0].tk_focusFollowsMouse()    # for all widgets
+            root.focus_follows_mouse = True
+        if self.instruments is not None:
+            self.instruments.count('cells_created', count)
+        return cells
+
+    def on_click(self, event):
+        col = event.widget.grid_info().get('column')
+        if col is not None:
+            col = int(col) - self.grid_origin[1] + self.origin()[1]
+            self.master.on_col_header_click(col, event.state & 0x0001)
+
+    def _destroy_cell(self, cell):
+        self.shown.pop(cell, None)
+        cell.destroy()  # out of the grid too
+        if self.instruments is not None:
+            self.instruments.count('cells_destroyed')
+
+    @timed('redraw')
     def redraw(self):
+        """Show the backing store at the current offsets. Cells whose
+        value and attrs did not change are not touched.
+        """
+        self.drawn = (self.origin(), self.count_row(), self.count_col())
+        if self.grid_origin == (0, 0):
+            # the first redraw places the cells, in the middle, see _rotate
+            self.grid_origin = (2 * self.count_row(), 2 * self.count_col())
+        self._layout()
+        self.redraw_region(0, self.count_row(), 0, self.count_col())
+
+    drawn = None    # (origin, rows, cols) of the grid at the last redraw
+    @timed('rotate')
+    def scroll(self):
+        """Show the backing store at the current offsets after only the
+        offsets changed. When the grid moved by fewer rows and columns
+        than it has, the on-screen rows and columns still in view are
+        rotated, see _rotate, and only those scrolled in are rendered:
+        a one row scroll costs O(columns) rather than O(cells).
+        """
+        rows, cols = self.count_row(), self.count_col()
+        origin = self.origin()
+        drawn = self.drawn
+        if drawn is None or drawn[1:] != (rows, cols):
+            return self.redraw()
+        dr = origin[0] - drawn[0][0]
+        dc = origin[1] - drawn[0][1]
+        if not dr and not dc:
+            return
+        if abs(dr) >= rows or abs(dc) >= cols or not self._rotate(dr, dc):
+            return self.redraw()
+        self.drawn = (origin, rows, cols)
+        self._layout()
+
+        if dr > 0:
+            self.redraw_region(rows - dr, rows, 0, cols)
+            row0, row1 = 0, rows - dr
+        elif dr < 0:
+            self.redraw_region(0, -dr, 0, cols)
+            row0, row1 = -dr, rows
+        else:
+            row0, row1 = 0, rows
+        if dc > 0:
+            self.redraw_region(row0, row1, cols - dc, cols)
+        elif dc < 0:
+            self.redraw_region(row0, row1, 0, -dc)
+
+    grid_origin = (0, 0)    # grid row and column of the top left cell
+    def _rotate(self, dr, dc):
+        """rotate the on-screen cells dr rows up and dc columns left, the
+        cells scrolled out moving to the other edge. Return False if the
+        cells in view are not where they should be, to be redrawn.
+
+        Instead of regridding every cell, the grid origin moves by dr, dc
+        and only the cells moving to the other edge are regridded, when
+        rendered; the emptied grid rows and columns take no space. The
+        origin starts in the middle of 4 grids' worth of rows and
+        columns, so that it can move both ways, and is put back there
+        when it runs out.
+        """
+        cells = self.cells
+        if dr:
+            cells[:] = cells[dr:] + cells[:dr]
+        if dc:
+            for row in cells:
+                row[:] = row[dc:] + row[:dc]
+        r, c = self.grid_origin[0] + dr, self.grid_origin[1] + dc
+        if not (0 <= r <= 4 * len(cells) and 0 <= c <= 4 * self.count_col()):
+            self.grid_origin = (2 * len(cells), 2 * self.count_col())
+            return False
+        self.grid_origin = (r, c)
+        return True
+
+    position = (0, 0)   # of the top left of the grid on its canvas
+    window = None   # (canvas, window item) showing the grid
+    def move_grid(self, x, y):
+        """show the grid at x, y pixels on its canvas"""
+        if (x, y) != self.position:
+            self.position = (x, y)
+            canvas, item = self.window
+            canvas.coords(item, x, y)
+
+    row_minsize = ()
+    fixed_height = ('col_header', 'footer', 'footer_header')    # rows of the default height
+    def _layout(self):
+        """give the on-screen rows the heights of the rows they show"""
+        if self.data in self.fixed_height:
+            return
+        sizes = self.master.row_sizes
+        if not sizes.sizes and not self.row_minsize:
+            return  # all the default height, as the Entry cells are
+        if not self.row_minsize:
+            self.row_minsize = {}   # grid row -> minsize
+        shown = self.row_minsize
+        offset = self.origin()[0]
+        first = self.grid_origin[0]
+        last = first + self.count_row()
+        for row in [row for row in shown if not first <= row < last]:
+            self.grid_rowconfigure(row, minsize=0)  # emptied by _rotate
+            del shown[row]
         for row in range(self.count_row()):
-            for col in range(self.count_col()):
-                iy = col + self.master.offset_x
-                ix = row + self.master.offset_y
-                if self.data == "row_header":
-                    self.set_value(row, col, ix)
-
-                    cd = self.master.row_default.copy()
-                    row_defaults = self.row_defaults
-                    if row_defaults and ix < len(row_defaults) and row_defaults[ix][0]:
-                        cd.update(row_defaults[ix][0])
-
-                    cd = self.master.get_keysdict(cd)
-                    self._set_attrs(row, col, cd)
-                elif self.data == "col_header":
-                    self.set_value(row, col, iy)
-
-                    cd = self.master.col_default.copy()
-                    col_defaults = self.col_defaults
-                    if col_defaults and iy < len(col_defaults) and col_defaults[iy]:
-                        cd.update(col_defaults[iy])
-
-                    cd = self.master.get_keysdict(cd)
-                    self._set_attrs(row, col, cd)
+            h = sizes.get(offset + row)
+            if shown.get(first + row) != h:
+                self.grid_rowconfigure(first + row, minsize=h)
+                shown[first + row] = h
+
+    def redraw_region(self, row0, row1, col0, col1):
+        """Show the backing store in on-screen rows row0..row1-1 and
+        columns col0..col1-1.
+        """
+        master = self.master
+        data = self.data
+        kind = data if isinstance(data, str) else 'table'
+        r0, c0 = self.origin()
+        r0 += row0
+        c0 += col0
+        if kind == 'table':
+            r1 = r0 + row1 - row0
+            c1 = c0 + col1 - col0
+            values, style_ids = master.get_view_block(r0, r1, c0, c1)
+
+        resolve = master.resolve_style
+        row_style = master.row_header.row_style
+        col_style = master.col_header.col_style
+        col_styles = [col_style(c0 + j) for j in range(col1 - col0)]
+
+        self._begin()
+        model_row = master.model_row
+        for i in range(row1 - row0):
+            row = row0 + i
+            ix = model_row(r0 + i)
+            rid = row_style(ix)
+            for j in range(col1 - col0):
+                col = col0 + j
+                iy = c0 + j
+                if kind == "row_header":
+                    value = ix
+                    default, attrs = resolve(kind, rid, 0, 0)
+                elif kind == "col_header":
+                    value = master.col_label(iy)
+                    default, attrs = resolve(kind, 0, col_styles[j], 0)
+                elif kind == "footer":
+                    value = master.footer_value(r0 + i, iy)
+                    default, attrs = resolve(kind, 0, col_styles[j], 0)
+                elif kind == "footer_header":
+                    value = master.footer[r0 + i]
+                    default, attrs = resolve(kind, 0, 0, 0)
                 else:
-                    if ix < len(self.data) and iy < len(self.data[0]):
-                        c = {}
-                        if self.data and self.data[ix]:
-                            c = self.data[ix][iy]
-                            if c == None:
-                                c = {}
-                            elif not isinstance(c, dict): # cell is a value
-                                c = {'v': c}
-
-                        cd = self.master.default.copy()
-                        row_defaults = self.master.row_header.row_defaults
-                        if row_defaults and ix < len(row_defaults) and row_defaults[ix][0]:
-                            cd.update(row_defaults[ix][0])
-                        col_defaults = self.master.col_header.col_defaults
-                        if col_defaults and iy < len(col_defaults) and col_defaults[iy]:
-                            cd.update(col_defaults[iy])
-                        cd.update(c)
-                        c = self.master.get_keysdict(cd)
-
-                        if self.data[ix] == None:
-                            self.clear_cell(row, col)
-                        elif self.data[ix][iy] == None:
-                            self.clear_cell(row, col)
-                        else:
-                            self.set_value_attrs(row, col, c)
-
-                self.cells[row][col].grid(row=row, column=col)
+                    value = values[i][j]
+                    if value is LOADING:
+                        value, attrs = resolve('loading', rid, col_styles[j], master.loading_style)
+                    else:
+                        sid = style_ids[i][j] if style_ids else 0
+                        default, attrs = resolve(kind, rid, col_styles[j], sid)
+                        if value is None:
+                            value = default
+
+                self._render(row, col, value, attrs, full=True)
+        self._flush()
+
+        if kind == 'table':
+            master.watch_model()
 
     def delete_row(self, pos, count=1):
 
@@ -1054,12 +2502,11 @@ class Cells(tk.Frame):
             self.cells.pop(pos)
 
             for j in range(len(deleted_row)):
-                deleted_row[j].grid_remove()
-                deleted_row[j].destroy()
+                self._destroy_cell(deleted_row[j])
 
         self._row_count -= count
 
-        self.redraw()
+        self.master.schedule_redraw([self])
 
     def delete_col(self, pos, count=1):
 
@@ -1077,19 +2524,14 @@ class Cells(tk.Frame):
             for i in range(count):
                 deleted_cell = row[pos]
                 row.pop(pos)
-                deleted_cell.grid_remove()
-                deleted_cell.destroy()
+                self._destroy_cell(deleted_cell)
 
         self._col_count -= count
 
-        self.redraw()
+        self.master.schedule_redraw([self])
 
     def clear_cell(self, row, col):
-        cell = self.cells[row][col]
-        last_state = cell.cget("state")
-        cell.config(state="normal")
-        cell.delete(0, tk.END)
-        cell.config(state=last_state)
+        self._render(row, col, None, {})
 
     def clear_all(self):
         for row in range(self.count_row()):
@@ -1097,6 +2539,1786 @@ class Cells(tk.Frame):
                 self.clear_cell(row, col)
 
 
+class CanvasCell:
+    """The canvas items standing for one cell of CanvasCells."""
+
+    __slots__ = ('rect', 'text')
+
+    def __init__(self, rect, text):
+        self.rect = rect
+        self.text = text
+
+
+class CanvasCells(Cells):
+    """Cells drawn as a rectangle and a text item per cell on a canvas,
+    moved with coords and restyled with itemconfigure, instead of one
+    gridded Entry widget per cell.
+
+    It keeps the Cells API. A cell of the table is edited in an Entry
+    laid over it on double click.
+    """
+
+    item_keys = ('bg', 'fg', 'font', 'justify')
+
+    def __init__(self, master, canvas, data=None):
+
+        Cells.__init__(self, master, data)
+        self.canvas = canvas    # the items of the cells are tagged self.tag
+        self.col_layout = []    # (x, width) of on-screen columns
+        self.row_layout = []    # (y, height) of on-screen rows
+        self.editor = None      # (entry, window item, view row, view col, row, col, text)
+
+        if not canvas.panes:    # the events go to the pane under them
+            canvas.bind('<MouseWheel>', master.on_mouse_scroll)
+            canvas.bind('<Double-Button-1>', self.on_double_click)
+            if data == "col_header":
+                canvas.bind('<Button-1>', self.on_click)
+        canvas.panes.append(self)
+
+    def _new_cells(self, count, text=None):
+        """create the items of count cells in one pass: one script
+        creating them all, and one itemconfigure per kind of item giving
+        them the defaults.
+        """
+        if count <= 0:
+            return []
+        master = self.master
+        canvas = self.canvas
+        attrs = {k: master.cell_option(k) for k in self.item_keys}
+        attrs.update((k, v) for k, v in master.get_keysdict(master.default).items()
+                     if k in self.item_keys)
+
+        rects, texts = self.tag + 'rect', self.tag + 'text'    # of the new items
+        script = []
+        for i in range(count):
+            script.append('[%s create rectangle 0 0 0 0 -width 0 -tags {%s %s}]'
+                          % (canvas, self.tag, rects))
+            script.append('[%s create text 0 0 -anchor w -tags {%s %s}]'
+                          % (canvas, self.tag, texts))
+        items = self.tk.splitlist(self.tk.eval('list ' + ' '.join(script)))
+        canvas.itemconfigure(rects, fill=attrs['bg'])
+        canvas.itemconfigure(texts, fill=attrs['fg'], font=attrs['font'])
+        canvas.dtag(rects)
+        canvas.dtag(texts)
+
+        cells = []
+        for i in range(count):
+            cell = CanvasCell(int(items[2 * i]), int(items[2 * i + 1]))
+            self.shown[cell] = ['', dict(attrs), None]
+            if text:
+                self._render_text(cell, str(text))
+            cells.append(cell)
+
+        if self.instruments is not None:
+            self.instruments.count('cells_created', count)
+        return cells
+
+    def _new_cell(self, text=None, mode='singleline'):
+        return self._new_cells(1, text)[0]
+
+    def _destroy_cell(self, cell):
+        self.shown.pop(cell, None)
+        self.canvas.delete(cell.rect, cell.text)
+        if self.instruments is not None:
+            self.instruments.count('cells_destroyed')
+
+    def _itemconfigure(self, item, conf):
+        if self.script is None:
+            self.canvas.itemconfigure(item, **conf)
+        else:
+            self.script.append('%s itemconfigure %d %s' % (self.canvas, item, ' '.join(
+                '-%s %s' % (k, tcl_quote(v)) for k, v in conf.items())))
+
+    def _coords(self, item, *coords):
+        if self.script is None:
+            self.canvas.coords(item, *coords)
+        else:
+            self.script.append('%s coords %d %s' % (self.canvas, item,
+                ' '.join(str(c) for c in coords)))
+
+    def _render_text(self, cell, text):
+        self._itemconfigure(cell.text, {'text': text})
+        self.shown[cell][0] = text
+
+    def _layout(self):
+        """lay out the on-screen columns and rows in pixels"""
+        master = self.master
+        r0, c0 = self.origin()
+        self.row_layout = []
+        if self.data in self.fixed_height:
+            h = master.cell_geometry()[1]
+            self.row_layout.extend((row * (h + 1), h) for row in range(self.count_row()))
+        else:
+            y = 0
+            for row in range(self.count_row()):
+                h = master.row_sizes.get(row + r0) - 1
+                self.row_layout.append((y, h))
+                y += h + 1  # 1 pixel grid line as the Entry cells' pady
+
+        self.col_layout = []
+        x = 0
+        for col in range(self.count_col()):
+            if self.data in ("row_header", "footer_header"):
+                w = master.chars_width(master.row_default.get('w', master.CELL_WIDTH))
+            else:
+                w = master.col_sizes.get(col + c0) - 1
+            self.col_layout.append((x, w))
+            x += w + 1  # 1 pixel grid line as the Entry cells' padx
+
+    def _fit(self, text, width):
+        """clip text to what fits in width pixels, as an Entry shows it"""
+        nchars = max(0, (width - 4) // self.master.char_width())
+        if len(text) > nchars:
+            return text[:nchars]
+        return text
+
+    def _render(self, row, col, value, attrs, full=False):
+        """Show value and attrs in an on-screen cell, sending Tk only
+        what differs from what the cell already shows.
+        """
+        cell = self.cells[row][col]
+        shown = self._shown(cell)
+        last = shown[1]
+
+        if full:
+            attrs = {k: attrs[k] if k in attrs else self.master.cell_option(k)
+                     for k in self.item_keys}
+        conf = {k: attrs[k] for k in self.item_keys
+                if k in attrs and (k not in last or last[k] != attrs[k])}
+        last.update(conf)
+
+        if row >= len(self.row_layout) or col >= len(self.col_layout):
+            self._layout()
+        x, w = self.col_layout[col]
+        y, h = self.row_layout[row]
+        justify = last.get('justify', 'left')
+
+        rect_conf = {}
+        text_conf = {}
+        if 'bg' in conf:
+            rect_conf['fill'] = conf['bg']
+        if 'fg' in conf:
+            text_conf['fill'] = conf['fg']
+        if 'font' in conf:
+            text_conf['font'] = conf['font']
+
+        text = self._fit('' if value is None else str(value), w)
+        if text != shown[0]:
+            text_conf['text'] = text
+            shown[0] = text
+
+        px, py = self.position
+        mx, my = self.moved
+        place = (x + px - mx, y + py - my, w, h, justify)
+        if shown[2] != place:
+            if justify == 'center':
+                anchor, tx = 'center', x + w // 2
+            elif justify == 'right':
+                anchor, tx = 'e', x + w - 2
+            else:
+                anchor, tx = 'w', x + 2
+            text_conf['anchor'] = anchor
+            self._coords(cell.rect, x + px, y + py, x + w + px, y + h + py)
+            self._coords(cell.text, tx + px, y + h // 2 + py)
+            shown[2] = place
+
+        if rect_conf:
+            self._itemconfigure(cell.rect, rect_conf)
+        if text_conf:
+            self._itemconfigure(cell.text, text_conf)
+        if (rect_conf or text_conf) and self.instruments is not None:
+            self.instruments.count('cells_updated')
+
+    def redraw(self):
+        Cells.redraw(self)
+        self._follow_editor()
+
+    def scroll(self):
+        Cells.scroll(self)
+        self._follow_editor()
+
+    def move_grid(self, x, y):
+        """move the cells to x, y pixels on the canvas, all at once"""
+        dx, dy = x - self.position[0], y - self.position[1]
+        if dx or dy:
+            self.position = (x, y)
+            self._move(dx, dy)
+
+    moved = (0, 0)  # pixels all the items were moved by, in place of coords
+    def _move(self, dx, dy):
+        self.moved = (self.moved[0] + dx, self.moved[1] + dy)
+        self.canvas.move(self.tag, dx, dy)
+
+    def _rotate(self, dr, dc):
+        """rotate the on-screen cells as Cells._rotate. All the items move
+        by the rows and columns scrolled out in one canvas move, and only
+        the cells moving to the other edge get new coords, when rendered.
+        """
+        master = self.master
+        (r0, c0), rows, cols = self.drawn
+        dy = master.row_sizes.offset(r0 + dr) - master.row_sizes.offset(r0) if dr else 0
+        dx = master.col_sizes.offset(c0 + dc) - master.col_sizes.offset(c0) if dc else 0
+        cells = self.cells
+        if dr:
+            cells[:] = cells[dr:] + cells[:dr]
+        if dc:
+            for row in cells:
+                row[:] = row[dc:] + row[:dc]
+        self._move(-dx, -dy)
+        return True
+
+    def cell_at(self, x, y):
+        """get on-screen (row, col) at canvas coordinates (x, y), or None"""
+        x -= self.position[0]
+        y -= self.position[1]
+        for row, (cy, h) in enumerate(self.row_layout):
+            if cy <= y <= cy + h:
+                break
+        else:
+            return None
+        for col, (cx, w) in enumerate(self.col_layout):
+            if cx <= x <= cx + w:
+                if row < self.count_row():
+                    return (row, col)
+                break
+        return None
+
+    def pane_at(self, event):
+        """get (pane, on-screen row, col) of the topmost pane of the
+        canvas under the event, or None
+        """
+        x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        for pane in reversed(self.canvas.panes):
+            pos = pane.cell_at(x, y)
+            if pos:
+                return (pane,) + pos
+        return None
+
+    def on_click(self, event):
+        found = self.pane_at(event)
+        if found:
+            pane, row, col = found
+            self.master.on_col_header_click(col + pane.origin()[1], event.state & 0x0001)
+
+    def on_double_click(self, event):
+        found = self.pane_at(event)
+        if found and not isinstance(found[0].data, str):    # headers are not editable
+            found[0].edit(found[1], found[2])
+
+    def edit(self, row, col):
+        """edit an on-screen cell in an Entry laid over it, filled with
+        the value of its backing store cell. Cells of read-only models
+        and cells still loading are not edited.
+        """
+        self.end_edit(commit=True)
+
+        master = self.master
+        model = master.model
+        r0, c0 = self.origin()
+        view_row, view_col = r0 + row, c0 + col
+        data_row = master.model_row(view_row)
+        if model.read_only or data_row >= model.row_count() or view_col >= master.data_cols:
+            return
+        value = model.get_block(data_row, data_row + 1, view_col, view_col + 1)[0][0]
+        if value is LOADING:
+            return
+        text = '' if value is None else str(value)
+
+        entry = tk.Entry(self.canvas, relief='flat', highlightthickness=1)
+        entry.insert(0, text)
+        entry.select_range(0, tk.END)
+        # tagged to move with the cells, see _move
+        window = self.canvas.create_window(0, 0, window=entry, anchor='nw', tags=self.tag)
+        # the view and backing store cell, as the offsets may change
+        # before commit, and the text to tell whether it was changed
+        self.editor = (entry, window, view_row, view_col, data_row, view_col, text)
+        self._follow_editor()
+
+        entry.bind('<Return>', lambda e: self.end_edit(commit=True))
+        entry.bind('<Escape>', lambda e: self.end_edit())
+        entry.bind('<FocusOut>', lambda e: self.end_edit(commit=True))
+        entry.focus_set()
+
+    def end_edit(self, commit=False):
+        """close the cell editor, setting its value to the backing store
+        cell it was opened on if commit, wherever it is shown now.
+        """
+        if not self.editor:
+            return
+        entry, window, view_row, view_col, row, col, text = self.editor
+        self.editor = None
+        value = entry.get()
+        self.canvas.delete(window)
+        entry.destroy()
+        if (commit and value != text
+                and row < self.master.model.row_count() and col < self.master.data_cols):
+            self._set_data_value(row, col, value)
+
+    def _follow_editor(self):
+        """lay the cell editor over its cell again after a redraw or a
+        scroll, or close it without committing when the cell is no
+        longer on the grid.
+        """
+        if not self.editor:
+            return
+        entry, window, view_row, view_col, row, col, text = self.editor
+        r0, c0 = self.origin()
+        i, j = view_row - r0, view_col - c0
+        if (0 <= i < len(self.row_layout) and 0 <= j < len(self.col_layout)
+                and self.master.model_row(view_row) == row):
+            x, w = self.col_layout[j]
+            y, h = self.row_layout[i]
+            self.canvas.coords(window, x + self.position[0], y + self.position[1])
+            self.canvas.itemconfigure(window, width=w, height=h)
+        else:
+            self.end_edit()
+
+
+def sort_key(value):
+    """Key sorting numbers, and text that reads as a number, before
+    other text, and empty cells last.
+    """
+    if value is None or value == '':
+        return (2, 0)
+    if isinstance(value, (int, float)):
+        return (0, value)
+    try:
+        return (0, float(value))
+    except (TypeError, ValueError):
+        return (1, str(value))
+
+
+class Matcher:
+    """Cell value test for find().
+
+    mode is 'substring' or 'regex', searching the text of a value, or
+    'number', comparing a value read as a number for equality. Empty
+    and loading cells never match.
+    """
+
+    def __init__(self, pattern, mode='substring', ignore_case=False):
+        self.mode = mode
+        if mode == 'substring':
+            pattern = str(pattern)
+            if ignore_case:
+                pattern = pattern.casefold()
+                self.test = lambda text: pattern in text.casefold()
+            else:
+                self.test = lambda text: pattern in text
+        elif mode == 'regex':
+            self.test = re.compile(pattern, re.IGNORECASE if ignore_case else 0).search
+        elif mode == 'number':
+            self.number = float(pattern)
+        else:
+            raise ValueError("unknown find mode %r" % (mode,))
+
+    def __call__(self, value):
+        if value is None or value is LOADING:
+            return False
+        if self.mode == 'number':
+            try:
+                return float(value) == self.number
+            except (TypeError, ValueError):
+                return False
+        return bool(self.test(str(value)))
+
+    def search(self, values):
+        """indexes of the matching values of a sequence"""
+        if (self.mode == 'number' and np is not None and isinstance(values, np.ndarray)
+                and values.dtype.kind in 'iuf'):
+            return np.flatnonzero(values == self.number).tolist()
+        return [i for i, value in enumerate(values) if self(value)]
+
+
+class FindIndex:
+    """Inverted index of the backing store of a model, the cells of each
+    distinct cell text, for repeated find() calls. A search tests each
+    distinct text once instead of every cell.
+
+    The cells, row * cols + col, are kept grouped by text in one array,
+    the cells of text i being cells[starts[i]:starts[i + 1]].
+    """
+
+    EMPTY = 0xFFFFFFFF  # text id of empty and loading cells
+
+    def __init__(self, model, chunk=65536):
+        self.cols = cols = model.col_count()
+        rows = model.row_count()
+        ids = {}            # text -> text id
+        codes = array('I')  # text id of each cell, in row-major order
+        step = max(chunk // max(cols, 1), 1)
+        for r0 in range(0, rows, step):
+            for values in model.get_block(r0, min(r0 + step, rows), 0, cols):
+                codes.extend(self.EMPTY if value is None or value is LOADING
+                             else ids.setdefault(str(value), len(ids))
+                             for value in values)
+        self.texts = list(ids)
+        self.starts, self.cells = self._group(codes, len(ids))
+
+    def _group(self, codes, count):
+        """counting sort of the cells by text id"""
+        if np is not None:
+            codes = np.frombuffer(codes, dtype=np.uint32)
+            order = np.argsort(codes, kind='stable')
+            counts = np.bincount(codes[codes != self.EMPTY], minlength=count)
+            starts = np.zeros(count + 1, dtype=np.uint64)
+            np.cumsum(counts, out=starts[1:])
+            cells = order[:int(starts[-1])].astype(np.uint64)
+            return array('Q', starts.tobytes()), array('Q', cells.tobytes())
+
+        starts = array('Q', [0]) * (count + 1)
+        for code in codes:
+            if code != self.EMPTY:
+                starts[code + 1] += 1
+        for i in range(count):
+            starts[i + 1] += starts[i]
+        cells = array('Q', [0]) * starts[-1]
+        pos = starts[:-1]
+        for i, code in enumerate(codes):
+            if code != self.EMPTY:
+                cells[pos[code]] = i
+                pos[code] += 1
+        return starts, cells
+
+    def search(self, matcher):
+        """(row, col) of the matching cells in row-major order"""
+        cells, starts = self.cells, self.starts
+        found = array('Q')
+        for i, text in enumerate(self.texts):
+            if matcher(text):
+                found.extend(cells[starts[i]:starts[i + 1]])
+        return [divmod(i, self.cols) for i in sorted(found)]
+
+
+def as_number(value):
+    """get value as an int or float, or None if it is not a number"""
+    if isinstance(value, (int, float)):
+        return None if value != value else value   # NaN
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            try:
+                value = float(value)
+            except ValueError:
+                return None
+            return None if value != value else value
+    if np is not None and isinstance(value, np.generic) and value.dtype.kind in 'biuf':
+        return as_number(value.item())
+    return None
+
+
+class ColumnAggregates:
+    """The aggregates of the numbers of each column of a model, 'count',
+    'sum', 'min', 'max' and 'mean'; other values are left out, see
+    as_number.
+
+    They are computed once, a chunk of rows of all the columns at a
+    time, vectorized for numeric columns of an ArrayTableModel, then
+    updated one changed value at a time. A min or max is only recomputed
+    when its value is changed, and then only when asked for.
+    """
+
+    names = ('count', 'sum', 'min', 'max', 'mean')
+
+    def __init__(self, model, chunk=65536):
+        self.model = model
+        self.chunk = chunk  # cells read at a time
+        self.rows = 0       # of the model, aggregated
+        self.count = []
+        self.sum = []
+        self.min = []
+        self.max = []
+        self.stale = set()  # columns whose min/max are to be recomputed
+        # the raw columns of an array are slices, read them column-wise
+        self.arrays = bool(np is not None and model.col_count()
+                           and isinstance(model.get_column(0, 0, 0), np.ndarray))
+        self.extend()
+
+    def _chunks(self, r0, r1, c0, c1):
+        """get (cols, columns) for each chunk of rows r0..r1-1, the values
+        of columns c0..c1-1 fetched once per chunk, by column.
+        """
+        model = self.model
+        step = max(self.chunk // max(c1 - c0, 1), 1)
+        for start in range(r0, r1, step):
+            end = min(start + step, r1)
+            if self.arrays:
+                yield [model.get_column(col, start, end) for col in range(c0, c1)]
+            else:
+                yield list(zip(*model.get_block(start, end, c0, c1)))
+
+    def extend(self):
+        """aggregate the rows and columns added to the model since, as
+        it grows while loading.
+        """
+        rows = self.model.row_count()
+        cols = self.model.col_count()
+        old_cols = len(self.count)
+        for col in range(old_cols, cols):
+            self.count.append(0)
+            self.sum.append(0)
+            self.min.append(None)
+            self.max.append(None)
+        # the new columns from the top, all of them for the new rows
+        for columns in self._chunks(0, self.rows, old_cols, cols):
+            for col, values in enumerate(columns, old_cols):
+                self._add(col, values)
+        for columns in self._chunks(self.rows, rows, 0, cols):
+            for col, values in enumerate(columns):
+                self._add(col, values)
+        self.rows = rows
+
+    def _numbers(self, values):
+        """get the numbers of values, an array if they are numeric"""
+        if np is not None and isinstance(values, np.ndarray) and values.dtype.kind in 'biuf':
+            if values.dtype.kind == 'f':
+                values = values[~np.isnan(values)]
+            return values
+        return [n for n in map(as_number, values) if n is not None]
+
+    def _add(self, col, values):
+        numbers = self._numbers(values)
+        if not len(numbers):
+            return
+        if isinstance(numbers, list):
+            total, low, high = sum(numbers), min(numbers), max(numbers)
+        else:
+            total, low, high = numbers.sum().item(), numbers.min().item(), numbers.max().item()
+        self.count[col] += len(numbers)
+        self.sum[col] += total
+        if col not in self.stale:
+            if self.min[col] is None or low < self.min[col]:
+                self.min[col] = low
+            if self.max[col] is None or high > self.max[col]:
+                self.max[col] = high
+
+    def _rescan(self):
+        """recompute the min and max of the stale columns"""
+        stale = sorted(self.stale)
+        c0 = stale[0]
+        for col in stale:
+            self.min[col] = self.max[col] = None
+        for columns in self._chunks(0, self.rows, c0, stale[-1] + 1):
+            for col in stale:
+                numbers = self._numbers(columns[col - c0])
+                if not len(numbers):
+                    continue
+                if isinstance(numbers, list):
+                    low, high = min(numbers), max(numbers)
+                else:
+                    low, high = numbers.min().item(), numbers.max().item()
+                if self.min[col] is None or low < self.min[col]:
+                    self.min[col] = low
+                if self.max[col] is None or high > self.max[col]:
+                    self.max[col] = high
+        self.stale.clear()
+
+    def update(self, col, old, new):
+        """note a value of <col> changed from old to new"""
+        if col >= len(self.count):
+            return
+        old = as_number(old)
+        new = as_number(new)
+        if old is not None:
+            self.count[col] -= 1
+            self.sum[col] -= old
+            if old == self.min[col] or old == self.max[col]:
+                self.stale.add(col)
+        if new is not None:
+            self.count[col] += 1
+            self.sum[col] += new
+            if col not in self.stale:
+                if self.min[col] is None or new < self.min[col]:
+                    self.min[col] = new
+                if self.max[col] is None or new > self.max[col]:
+                    self.max[col] = new
+
+    def get(self, col, name):
+        """get the aggregate <name> of <col>, None if it has no numbers"""
+        count = self.count[col] if col < len(self.count) else 0
+        if name == 'count':
+            return count
+        if not count:
+            return None
+        if name == 'sum':
+            return self.sum[col]
+        if name == 'mean':
+            return self.sum[col] / count
+        if col in self.stale:
+            self._rescan()
+        if name == 'min':
+            return self.min[col]
+        if name == 'max':
+            return self.max[col]
+        raise ValueError("unknown aggregate %r" % (name,))
+
+
+class SizeIndex:
+    """Sizes in pixels of the rows or columns of a table, the default
+    size unless set.
+
+    The differences from the default are kept in a Fenwick tree, so the
+    pixel offset of an index and the index at a pixel offset are both
+    O(log n), however many rows there are and however their sizes vary.
+    """
+
+    def __init__(self, default):
+        self.default = default
+        self.sizes = {}                 # index -> size, if not default
+        self.tree = array('q', [0])     # Fenwick tree, 1-based
+
+    def get(self, i):
+        return self.sizes.get(i, self.default)
+
+    def set(self, i, size):
+        """set the size of i, None for the default"""
+        default = self.default
+        old = self.sizes.get(i, default)
+        if size is None:
+            size = default
+        if size == old:
+            return
+        if size == default:
+            del self.sizes[i]
+        else:
+            self.sizes[i] = size
+        if i < len(self.tree) - 1:
+            self._add(i, size - old)
+        else:
+            self._rebuild()
+
+    def reset(self, sizes=()):
+        """set all the sizes at once, (index, size) pairs, the others
+        the default.
+        """
+        self.sizes = {i: size for i, size in sizes if size != self.default}
+        self._rebuild()
+
+    def set_default(self, default):
+        self.default = default
+        self.reset(self.sizes.items())
+
+    def _rebuild(self):
+        sizes = self.sizes
+        capacity = 0
+        if sizes:
+            capacity = 1
+            while capacity <= max(sizes):
+                capacity <<= 1
+        default = self.default
+        if np is not None and sizes:
+            # node j sums the differences of j - lowbit(j)..j - 1
+            deltas = np.zeros(capacity + 1, dtype=np.int64)
+            deltas[np.fromiter(sizes.keys(), np.int64, len(sizes)) + 1] = \
+                np.fromiter(sizes.values(), np.int64, len(sizes)) - default
+            cum = np.cumsum(deltas)
+            j = np.arange(capacity + 1)
+            self.tree = array('q', (cum - cum[j - (j & -j)]).tobytes())
+            return
+
+        tree = array('q', [0]) * (capacity + 1)
+        for i, size in sizes.items():
+            tree[i + 1] = size - default
+        for j in range(1, capacity + 1):   # add each node to its parent
+            parent = j + (j & -j)
+            if parent <= capacity:
+                tree[parent] += tree[j]
+        self.tree = tree
+
+    def _add(self, i, delta):
+        tree = self.tree
+        i += 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def offset(self, i):
+        """get the pixel offset of i, the total size of 0..i-1"""
+        tree = self.tree
+        total = i * self.default
+        j = min(i, len(tree) - 1)
+        while j > 0:
+            total += tree[j]
+            j -= j & -j
+        return total
+
+    def find(self, pixel):
+        """get the index at pixel offset <pixel>"""
+        tree = self.tree
+        default = self.default
+        capacity = len(tree) - 1
+        pixel = max(int(pixel), 0)
+        pos = 0
+        step = capacity
+        while step:
+            if pos + step <= capacity:
+                span = step * default + tree[pos + step]
+                if span <= pixel:
+                    pos += step
+                    pixel -= span
+            step >>= 1
+        if pos < capacity:
+            return pos
+        return pos + pixel // default   # past the sizes set, all default
+
+    def count(self, start, pixels):
+        """get the number of indexes, from start, in view in pixels"""
+        if pixels <= 0:
+            return 0
+        return self.find(self.offset(start) + pixels - 1) - start + 1
+
+    def last_offset(self, count, pixels):
+        """get the first index of the last <pixels> of <count> indexes,
+        rounded up to a whole index
+        """
+        excess = self.offset(count) - pixels
+        if excess <= 0:
+            return 0
+        i = self.find(excess)
+        return i if self.offset(i) == excess else i + 1
+
+
+class Instruments:
+    """Timings and counters of the hot paths of a TableFrame, turned on
+    with TableFrame.set_instruments.
+
+    Spans time the calls of the methods marked @timed: 'redraw', 'resync',
+    'set_data', 'fetch' of data, 'offset' changes and the input handlers.
+    The outermost span of a call is a frame; its time goes into the
+    frame-time histogram and to callback(name, seconds). The counters
+    are of cells created, destroyed and updated and of style cache hits
+    and misses. Times are of the Python side, Tk draws when idle after.
+    """
+
+    edges = (1, 2, 4, 8, 16, 33, 66, 133, 266)    # ms, upper bounds of the histogram bins
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.reset()
+
+    def reset(self):
+        self.spans = {}         # name -> [calls, seconds, max seconds]
+        self.counters = {}      # name -> count
+        self.histogram = [0] * (len(self.edges) + 1)
+        self.frames = 0
+        self.depth = 0          # of the spans being timed
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def span(self, name, seconds):
+        span = self.spans.get(name)
+        if span is None:
+            span = self.spans[name] = [0, 0.0, 0.0]
+        span[0] += 1
+        span[1] += seconds
+        if seconds > span[2]:
+            span[2] = seconds
+
+    def frame(self, name, seconds):
+        self.frames += 1
+        self.histogram[bisect.bisect_left(self.edges, seconds * 1000)] += 1
+        if self.callback:
+            self.callback(name, seconds)
+
+    def stats(self):
+        """get {'spans': {name: {'calls', 'ms', 'max_ms'}}, 'counters',
+        'frames', 'histogram': [(upper bound ms or None, frames)]}
+        """
+        return {
+            'spans': {name: {'calls': calls, 'ms': seconds * 1000, 'max_ms': longest * 1000}
+                      for name, (calls, seconds, longest) in self.spans.items()},
+            'counters': dict(self.counters),
+            'frames': self.frames,
+            'histogram': list(zip(self.edges + (None,), self.histogram)),
+        }
+
+
+class StyleTable:
+    """Registry of interned cell attributes.
+
+    Each distinct combination of cell attributes is stored once, as a
+    flyweight, and cells refer to it by a small integer style id, so a
+    million highlighted cells share one dict. Style 0 is no attributes.
+    The dicts returned by get() are shared and must not be modified.
+    Styles may be interned from prefetch threads, under a lock.
+    """
+
+    def __init__(self):
+        self.styles = [{}]
+        self.ids = {frozenset(): 0}
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.styles)
+
+    def intern(self, attrs):
+        """get the style id of attrs"""
+        if not attrs:
+            return 0
+        key = frozenset(attrs.items())
+        sid = self.ids.get(key)
+        if sid is None:
+            with self.lock:
+                sid = self.ids.get(key)     # unless interned meanwhile
+                if sid is None:
+                    sid = len(self.styles)
+                    self.styles.append(dict(attrs))
+                    self.ids[key] = sid
+        return sid
+
+    def get(self, sid):
+        """get the attrs of style id sid"""
+        return self.styles[sid]
+
+    def merge(self, sid, attrs):
+        """get the style id of style sid updated with attrs"""
+        if not sid:
+            return self.intern(attrs)
+        merged = dict(self.styles[sid])
+        merged.update(attrs)
+        return self.intern(merged)
+
+
+class TableModel:
+    """The backing store of a TableFrame.
+
+    The widget reads a model only through this interface, a viewport
+    sized block at a time, so the data need not be held in memory.
+    Rows and columns are indexed from 0.
+
+    A model implements:
+
+    row_count(), col_count()
+        the size of the data.
+
+    get_block(r0, r1, c0, c1)
+        the values of rows r0..r1-1 and columns c0..c1-1 as a list of
+        rows, each a list of c1-c0 values. Cells beyond the data or
+        without a value are None.
+
+    and optionally:
+
+    get_style_block(r0, r1, c0, c1)
+        the style ids, in styles, of the cell attributes of the same
+        block as a list of rows of ints, 0 for none. None for the whole
+        block when it has no cell attributes.
+
+    get_attrs_block(r0, r1, c0, c1)
+        the cell attributes, in internal keys (see TableFrame.ikeys), of
+        the same block as a list of rows of dicts or None. A model
+        implements either of get_style_block or get_attrs_block, the
+        default is no cell attributes.
+
+    set_value(row, col, value), set_attrs(row, col, attrs)
+        write to a cell, attrs in internal keys. Read-only models leave
+        them out and set read_only.
+
+    get_column(col, r0=0, r1=None)
+        the values of a column in rows r0..r1-1, all rows by default, as
+        a sequence, for sorting and filtering. By default it is fetched
+        a block at a time.
+
+    loading(), progress()
+        whether the model is still growing or fetching in the
+        background, and how far it got from 0.0 to 1.0. TableFrame polls
+        a loading model to extend its scrollbars. The default is fully
+        loaded.
+
+    changes()
+        the blocks (r0, r1, c0, c1) that changed in the background since
+        the last call, for TableFrame to redraw while it polls.
+
+    A value of LOADING in a block is shown as a placeholder, see
+    TableFrame.set_loading_style.
+    """
+
+    read_only = False
+
+    def row_count(self):
+        raise NotImplementedError
+
+    def col_count(self):
+        raise NotImplementedError
+
+    def get_block(self, r0, r1, c0, c1):
+        raise NotImplementedError
+
+    styles = StyleTable()   # shared by all models unless one sets its own
+
+    def get_style_block(self, r0, r1, c0, c1):
+        block = self.get_attrs_block(r0, r1, c0, c1)
+        if block is None:
+            return None
+        intern = self.styles.intern
+        return [[intern(attrs) if attrs else 0 for attrs in row] for row in block]
+
+    def get_attrs_block(self, r0, r1, c0, c1):
+        return None
+
+    def set_value(self, row, col, value):
+        raise NotImplementedError("%s is read-only" % type(self).__name__)
+
+    def set_attrs(self, row, col, attrs):
+        raise NotImplementedError("%s is read-only" % type(self).__name__)
+
+    def get_column(self, col, r0=0, r1=None):
+        if r1 is None:
+            r1 = self.row_count()
+        values = []
+        for start in range(r0, r1, 4096):
+            end = min(start + 4096, r1)
+            values.extend(row[0] for row in self.get_block(start, end, col, col + 1))
+        return values
+
+    def loading(self):
+        return False
+
+    def progress(self):
+        return 1.0
+
+    def changes(self):
+        return []
+
+
+class ListTableModel(TableModel):
+    """TableModel of a list of rows, the format TableFrame.set_data has
+    always taken.
+
+    data is a list of rows, each of rows is a list of cells, each cell
+    is either a value or a dict which contains cell value and cell
+    attributes. A row or a cell could be None. The trailing Nones
+    could be omitted for columns or rows, in which case data_rows and/
+    or data_cols should be specified. This is a trade-off for space and
+    time efficiency for daily use-cases.
+
+    Cell dict has the following keys which have internal keys to save
+    space for large data set:
+
+    keys = ['value', 'font', 'justify', 'bg', 'fg', 'width', 'height',
+            'state']
+    ikeys = ['v', 'ft', 'a', 'b', 'f', 'w', 'h', 's']
+
+    Other keys supported by Entry Widget are transferred to the cell
+    widget.
+
+    Attributes set later with set_attrs are not kept in the rows but
+    interned in styles, with a style id per cell in an array per row.
+    """
+
+    def __init__(self, data, data_rows=0, data_cols=0):
+        self.data = data
+        self.data_rows = data_rows
+        self.data_cols = max([len(row) for row in data if row] + [data_cols])
+        self.style_ids = {}     # row -> array of style ids of its cells
+
+    def row_count(self):
+        return max(len(self.data), self.data_rows)
+
+    def col_count(self):
+        return self.data_cols
+
+    def get_block(self, r0, r1, c0, c1):
+        data = self.data
+        ncols = c1 - c0
+        block = []
+        for r in range(r0, r1):
+            row = data[r] if r < len(data) else None
+            if not row:
+                block.append([None] * ncols)
+                continue
+            values = [c.get('v') if isinstance(c, dict) else c for c in row[c0:c1]]
+            if len(values) < ncols:
+                values.extend([None] * (ncols - len(values)))
+            block.append(values)
+        return block
+
+    def get_style_block(self, r0, r1, c0, c1):
+        data = self.data
+        styles = self.styles
+        ncols = c1 - c0
+        block = None
+        for r in range(r0, r1):
+            ids = self.style_ids.get(r)
+            row = data[r] if r < len(data) else None
+            cells = row[c0:c1] if row else ()
+            dicts = [i for i, c in enumerate(cells) if isinstance(c, dict)]
+            if ids is None and not dicts:
+                continue
+            if block is None:
+                block = [[0] * ncols for i in range(r1 - r0)]
+            out = block[r - r0]
+            if ids is not None:
+                part = ids[c0:c1]
+                out[:len(part)] = part
+            for i in dicts:     # attributes given in the data itself
+                attrs = {k: v for k, v in cells[i].items() if k != 'v'}
+                out[i] = styles.merge(out[i], attrs)
+        return block
+
+    def get_attrs_block(self, r0, r1, c0, c1):
+        block = self.get_style_block(r0, r1, c0, c1)
+        if block is None:
+            return None
+        get = self.styles.get
+        return [[get(sid) if sid else None for sid in row] for row in block]
+
+    def _fill_empty(self, row, col):
+        data = self.data
+        if len(data) <= row:
+            data.extend([None] * (row - len(data) + 1))
+        if data[row] is None:
+            data[row] = []
+        if len(data[row]) <= col:
+            data[row].extend([None] * (col - len(data[row]) + 1))
+        self.data_cols = max(self.data_cols, col + 1)
+
+    def set_value(self, row, col, value):
+        self._fill_empty(row, col)
+        c = self.data[row][col]
+        if isinstance(c, dict):
+            c.update(v=value)
+        else:
+            self.data[row][col] = value
+
+    def set_attrs(self, row, col, attrs):
+        self._fill_empty(row, col)
+        c = self.data[row][col]
+        if isinstance(c, dict):     # move the cell's own attributes to styles
+            attrs = dict(c, **attrs)
+            self.data[row][col] = attrs.pop('v', None)
+
+        ids = self.style_ids.get(row)
+        if ids is None:
+            ids = self.style_ids[row] = array('I', [0]) * (col + 1)
+        elif len(ids) <= col:
+            ids.extend(array('I', [0]) * (col + 1 - len(ids)))
+        ids[col] = self.styles.merge(ids[col], attrs)
+
+
+class ArrayTableModel(TableModel):
+    """TableModel of a 2-D numpy array of values.
+
+    A packed array takes a fraction of the memory of a list of rows of
+    Python objects. The visible block is fetched as one slice and
+    formatted to strings in one vectorized pass, with fmt (a % format
+    such as '%.2f') if given.
+
+    Cell attributes, in internal keys, may be given as {row: {col: attrs}}.
+    They are interned in styles, with the style ids in an array of the
+    shape of values, allocated when the first cell gets attributes.
+    """
+
+    def __init__(self, values, attrs=None, fmt=None):
+        if np is None:
+            raise ImportError("ArrayTableModel needs numpy")
+        values = np.asarray(values)
+        if values.ndim != 2:
+            raise ValueError("values must be a 2-D array, not %d-D" % values.ndim)
+        self.values = values
+        self.fmt = fmt
+        self.style_ids = None
+
+        for row, row_attrs in (attrs or {}).items():
+            for col, cell_attrs in row_attrs.items():
+                self.set_attrs(row, col, cell_attrs)
+
+    def row_count(self):
+        return self.values.shape[0]
+
+    def col_count(self):
+        return self.values.shape[1]
+
+    def format(self, block):
+        """format a block of values to an array of strings"""
+        if self.fmt:
+            return np.char.mod(self.fmt, block)
+        return block.astype(str)
+
+    def get_block(self, r0, r1, c0, c1):
+        ncols = c1 - c0
+        block = self.format(self.values[r0:r1, c0:c1]).tolist()
+        if block and len(block[0]) < ncols:
+            for values in block:
+                values.extend([None] * (ncols - len(values)))
+        if len(block) < r1 - r0:
+            block.extend([None] * ncols for i in range(r1 - r0 - len(block)))
+        return block
+
+    def get_style_block(self, r0, r1, c0, c1):
+        if self.style_ids is None:
+            return None
+        block = np.zeros((r1 - r0, c1 - c0), dtype=self.style_ids.dtype)
+        ids = self.style_ids[r0:r1, c0:c1]
+        block[:ids.shape[0], :ids.shape[1]] = ids
+        return block.tolist()
+
+    def get_attrs_block(self, r0, r1, c0, c1):
+        block = self.get_style_block(r0, r1, c0, c1)
+        if block is None:
+            return None
+        get = self.styles.get
+        return [[get(sid) if sid else None for sid in row] for row in block]
+
+    def get_column(self, col, r0=0, r1=None):
+        return self.values[r0:r1, col]
+
+    def set_value(self, row, col, value):
+        self.values[row, col] = value
+
+    def set_attrs(self, row, col, attrs):
+        if self.style_ids is None:
+            self.style_ids = np.zeros(self.values.shape, dtype=np.uint16)
+        sid = self.styles.merge(int(self.style_ids[row, col]), attrs)
+        if sid > np.iinfo(self.style_ids.dtype).max:
+            self.style_ids = self.style_ids.astype(np.uint32)
+        self.style_ids[row, col] = sid
+
+
+class CsvTableModel(TableModel):
+    """Read-only TableModel of a CSV or TSV file, memory mapped.
+
+    A background thread indexes the file offset of every row, so the
+    table opens at once whatever the file size and grows as the index
+    does. Only the rows fetched by get_block are parsed. Quoted fields
+    may span lines. Values are strings.
+
+    delimiter defaults to tab for .tsv/.tab files and comma otherwise.
+    """
+
+    read_only = True
+    chunk_size = 1 << 22    # bytes indexed at a time
+
+    def __init__(self, path, delimiter=None, encoding='utf-8'):
+        if delimiter is None:
+            ext = os.path.splitext(path)[1].lower()
+            delimiter = '\t' if ext in ('.tsv', '.tab') else ','
+        self.path = path
+        self.delimiter = delimiter
+        self.encoding = encoding
+
+        self.file = open(path, 'rb')
+        self.size = os.fstat(self.file.fileno()).st_size
+        if self.size:
+            self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.mm = b''
+
+        self.offsets = array('Q', [0])  # row i is offsets[i]:offsets[i+1]
+        self.indexed = 0                # bytes indexed so far
+        self.cols = 0
+        self.lock = threading.Lock()
+        self.closed = False
+        self.thread = threading.Thread(target=self._index, daemon=True)
+        self.thread.start()
+
+    def _index(self):
+        mm = self.mm
+        size = self.size
+        chunk_size = self.chunk_size
+        newline = re.compile(b'\n')
+        special = re.compile(b'["\n]')
+        in_quote = False
+        pos = 0
+        while pos < size and not self.closed:
+            chunk = mm[pos:pos + chunk_size]
+            if not in_quote and b'"' not in chunk:
+                if np is not None:
+                    ends = np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == 10)
+                    ends += pos + 1
+                    found = array('Q', ends.astype(np.uint64).tobytes())
+                else:
+                    found = array('Q', [pos + m.end() for m in newline.finditer(chunk)])
+            else:   # newlines within quotes do not end a row
+                found = array('Q')
+                for m in special.finditer(chunk):
+                    if m.group() == b'"':
+                        in_quote = not in_quote
+                    elif not in_quote:
+                        found.append(pos + m.end())
+            pos += len(chunk)
+            with self.lock:
+                self.offsets.extend(found)
+                if pos >= size and self.offsets[-1] < size:
+                    self.offsets.append(size)   # last row without newline
+                self.indexed = pos
+            if not self.cols and len(self.offsets) > 1:
+                self.cols = len(self._parse(0, 1)[0])
+
+    def _parse(self, r0, r1):
+        with self.lock:
+            start = self.offsets[r0]
+            end = self.offsets[r1]
+        text = self.mm[start:end].decode(self.encoding, errors='replace')
+        return list(csv.reader(io.StringIO(text, newline=''), delimiter=self.delimiter))
+
+    def close(self):
+        self.closed = True
+        self.thread.join()
+        if self.size:
+            self.mm.close()
+        self.file.close()
+
+    def row_count(self):
+        return len(self.offsets) - 1
+
+    def col_count(self):
+        return self.cols
+
+    def loading(self):
+        return self.indexed < self.size and not self.closed
+
+    def progress(self):
+        return self.indexed / self.size if self.size else 1.0
+
+    def get_block(self, r0, r1, c0, c1):
+        ncols = c1 - c0
+        end = min(r1, self.row_count())
+        block = []
+        if r0 < end:
+            for row in self._parse(r0, end):
+                values = row[c0:c1]
+                if len(row) > self.cols:
+                    self.cols = len(row)
+                if len(values) < ncols:
+                    values.extend([None] * (ncols - len(values)))
+                block.append(values)
+        block.extend([None] * ncols for i in range(r1 - r0 - len(block)))
+        return block
+
+
+class ImportTableModel(ListTableModel):
+    """ListTableModel of a CSV, TSV or JSON Lines file, read into memory
+    on a background thread.
+
+    Parsed rows are appended to the list of rows in batches, so the
+    table shows the first rows at once and grows while the rest load.
+    The rows are kept as parsed, without intermediate copies. A JSON
+    line is a list of values, or an object whose keys are the columns,
+    see columns. CSV/TSV values are strings.
+
+    format is 'csv', 'tsv' or 'jsonl', by default from the file
+    extension: .tsv/.tab is TSV, .jsonl/.ndjson JSON Lines, else CSV.
+    """
+
+    first_batch = 256       # rows, doubled per batch up to batch_rows
+
+    def __init__(self, path, format=None, encoding='utf-8', batch_rows=65536):
+        ListTableModel.__init__(self, [])
+        if format is None:
+            ext = os.path.splitext(path)[1].lower()
+            format = {'.tsv': 'tsv', '.tab': 'tsv',
+                      '.jsonl': 'jsonl', '.ndjson': 'jsonl'}.get(ext, 'csv')
+        if format not in ('csv', 'tsv', 'jsonl'):
+            raise ValueError("unknown import format %r" % (format,))
+        self.path = path
+        self.format = format
+        self.batch_rows = batch_rows
+        self.columns = []       # JSON object keys, in column order
+        self.error = None       # exception that stopped loading
+
+        self.file = open(path, encoding=encoding, newline='')
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.read = 0           # bytes read so far
+        self.ready = threading.Event()  # set once the first batch is in
+        self.closed = False
+        self.done = False
+        self.thread = threading.Thread(target=self._load, daemon=True)
+        self.thread.start()
+
+    def _rows(self):
+        if self.format == 'jsonl':
+            columns = {}
+            for number, line in enumerate(self.file, 1):
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                if not isinstance(row, (list, dict)):
+                    raise ValueError("line %d: a JSON line must be a list or an object, not %s"
+                                     % (number, type(row).__name__))
+                if isinstance(row, dict):
+                    values = [None] * len(columns)
+                    for key, value in row.items():
+                        col = columns.get(key)
+                        if col is None:
+                            col = columns[key] = len(columns)
+                            self.columns.append(key)
+                            values.append(None)
+                        values[col] = value
+                    row = values
+                yield row
+        else:
+            yield from csv.reader(self.file, delimiter='\t' if self.format == 'tsv' else ',')
+
+    def _load(self):
+        data = self.data
+        batch = []
+        size = self.first_batch
+        try:
+            for row in self._rows():
+                batch.append(row)
+                if len(batch) >= size:
+                    self._append(data, batch)
+                    batch = []
+                    size = min(size * 2, self.batch_rows)
+                    if self.closed:
+                        return
+            self._append(data, batch)
+        except Exception as e:
+            self.error = e
+            self._append(data, batch)   # the rows before the error
+        finally:
+            self.done = True
+            self.ready.set()
+            self.file.close()
+
+    def _append(self, data, batch):
+        cols = max(map(len, batch), default=0)
+        if cols > self.data_cols:
+            self.data_cols = cols
+        data.extend(batch)
+        self.read = self.file.buffer.tell()
+        self.ready.set()
+
+    def close(self):
+        self.closed = True
+        self.thread.join()
+
+    def loading(self):
+        return not self.done
+
+    def progress(self):
+        return self.read / self.size if self.size and not self.done else 1.0
+
+
+class TileCache(TableModel):
+    """TableModel caching a slower model in tiles of tile_rows x tile_cols
+    cells, so scrolling over the same area does not fetch it again.
+
+    At most max_tiles tiles, and about max_bytes of them if given, are
+    kept; the least recently used tiles are evicted first. hits and
+    misses count tile lookups. Writes through the cache invalidate their
+    tile; call invalidate, invalidate_rows or invalidate_all when the
+    underlying model changes by other means.
+    """
+
+    def __init__(self, model, tile_rows=64, tile_cols=16, max_tiles=1024, max_bytes=None):
+        self.model = model
+        self.styles = model.styles
+        self.read_only = model.read_only
+        self.tile_rows = tile_rows
+        self.tile_cols = tile_cols
+        self.max_tiles = max_tiles
+        self.max_bytes = max_bytes
+
+        self.tiles = OrderedDict()  # (tile row, tile col) -> (values, style ids, bytes)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def row_count(self):
+        return self.model.row_count()
+
+    def col_count(self):
+        return self.model.col_count()
+
+    def loading(self):
+        return self.model.loading()
+
+    def progress(self):
+        return self.model.progress()
+
+    def _sizeof(self, values, style_ids):
+        size = sys.getsizeof(values)
+        for row in values:
+            size += sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row if v is not None)
+        if style_ids:
+            size += sum(sys.getsizeof(row) for row in style_ids)
+        return size
+
+    def tile(self, tr, tc):
+        """get (values, style ids) of tile (tr, tc)"""
+        key = (tr, tc)
+        with self.lock:
+            tile = self.tiles.get(key)
+            if tile is not None:
+                self.tiles.move_to_end(key)
+                self.hits += 1
+                return tile
+            self.misses += 1
+
+        model = self.model
+        r0 = tr * self.tile_rows
+        r1 = r0 + self.tile_rows
+        c0 = tc * self.tile_cols
+        c1 = c0 + self.tile_cols
+        tile = (model.get_block(r0, r1, c0, c1), model.get_style_block(r0, r1, c0, c1))
+        if model.loading() and (r1 > model.row_count() or c1 > model.col_count()
+                                or any(v is LOADING for row in tile[0] for v in row)):
+            return tile     # not complete yet
+
+        size = self._sizeof(*tile) if self.max_bytes else 0
+        with self.lock:
+            old = self.tiles.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+            self.tiles[key] = tile + (size,)
+            self.bytes += size
+            while self.tiles and (len(self.tiles) > self.max_tiles
+                                  or self.max_bytes and self.bytes > self.max_bytes):
+                self.bytes -= self.tiles.popitem(last=False)[1][2]
+        return tile
+
+    def has_tile(self, tr, tc):
+        return (tr, tc) in self.tiles
+
+    def _assemble(self, r0, r1, c0, c1, which, fill):
+        tile_rows = self.tile_rows
+        tile_cols = self.tile_cols
+        block = [[] for i in range(r1 - r0)]
+        found = False
+        if r0 >= r1 or c0 >= c1:
+            return block, found
+        for tr in range(r0 // tile_rows, (r1 - 1) // tile_rows + 1):
+            tr0 = tr * tile_rows
+            rs = max(r0, tr0)
+            re_ = min(r1, tr0 + tile_rows)
+            for tc in range(c0 // tile_cols, (c1 - 1) // tile_cols + 1):
+                tc0 = tc * tile_cols
+                cs = max(c0, tc0) - tc0
+                ce = min(c1, tc0 + tile_cols) - tc0
+                part = self.tile(tr, tc)[which]
+                if part is None:
+                    for r in range(rs, re_):
+                        block[r - r0].extend([fill] * (ce - cs))
+                else:
+                    found = True
+                    for r in range(rs, re_):
+                        block[r - r0].extend(part[r - tr0][cs:ce])
+        return block, found
+
+    def get_block(self, r0, r1, c0, c1):
+        return self._assemble(r0, r1, c0, c1, 0, None)[0]
+
+    def get_style_block(self, r0, r1, c0, c1):
+        block, found = self._assemble(r0, r1, c0, c1, 1, 0)
+        return block if found else None
+
+    def prefetch(self, r0, r1, c0, c1):
+        """load the tiles covering a block into the cache"""
+        for tr in range(r0 // self.tile_rows, (max(r1, r0 + 1) - 1) // self.tile_rows + 1):
+            for tc in range(c0 // self.tile_cols, (max(c1, c0 + 1) - 1) // self.tile_cols + 1):
+                if not self.has_tile(tr, tc):
+                    self.tile(tr, tc)
+
+    def invalidate(self, row, col):
+        """forget the tile of a cell"""
+        with self.lock:
+            old = self.tiles.pop((row // self.tile_rows, col // self.tile_cols), None)
+            if old is not None:
+                self.bytes -= old[2]
+
+    def invalidate_rows(self, r0, r1):
+        """forget the tiles of rows r0..r1-1"""
+        tr0 = r0 // self.tile_rows
+        tr1 = (r1 - 1) // self.tile_rows
+        with self.lock:
+            for key in [key for key in self.tiles if tr0 <= key[0] <= tr1]:
+                self.bytes -= self.tiles.pop(key)[2]
+
+    def invalidate_block(self, r0, r1, c0, c1):
+        """forget the tiles of rows r0..r1-1 and columns c0..c1-1"""
+        tr0, tr1 = r0 // self.tile_rows, (r1 - 1) // self.tile_rows
+        tc0, tc1 = c0 // self.tile_cols, (c1 - 1) // self.tile_cols
+        with self.lock:
+            for key in [key for key in self.tiles
+                        if tr0 <= key[0] <= tr1 and tc0 <= key[1] <= tc1]:
+                self.bytes -= self.tiles.pop(key)[2]
+
+    def invalidate_all(self):
+        with self.lock:
+            self.tiles.clear()
+            self.bytes = 0
+
+    def changes(self):
+        """the changes of the underlying model, whose tiles are forgotten"""
+        changed = self.model.changes()
+        for block in changed:
+            self.invalidate_block(*block)
+        return changed
+
+    def get_column(self, col, r0=0, r1=None):
+        return self.model.get_column(col, r0, r1)
+
+    def set_value(self, row, col, value):
+        self.model.set_value(row, col, value)
+        self.invalidate(row, col)
+
+    def set_attrs(self, row, col, attrs):
+        self.model.set_attrs(row, col, attrs)
+        self.invalidate(row, col)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'tiles': len(self.tiles), 'bytes': self.bytes}
+
+
+class Prefetcher:
+    """Loads the viewport windows a TableFrame is about to scroll to into
+    its TileCache model, on a pool of worker threads.
+
+    The windows ahead are predicted from the direction and speed of the
+    last scrolls: the faster the scrolling, the more windows ahead, up
+    to max_windows. When the prediction changes, requests not started
+    yet are cancelled and those already queued but no longer wanted are
+    dropped, so fast flings do not load windows nobody will see.
+    Finished loads are handed back to the Tk main loop with after.
+    """
+
+    lookahead = 0.25    # seconds of scrolling to prefetch ahead
+    poll_interval = 20  # ms
+
+    def __init__(self, table_frame, workers=2, max_windows=4):
+        self.table_frame = table_frame
+        self.max_windows = max_windows
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.pending = {}       # window -> future
+        self.wanted = set()
+        self.done = queue.Queue()
+        self.polling = None     # after id of the next _poll
+        self.velocity = {'x': 0.0, 'y': 0.0}   # rows/cols per second
+        self.last_scroll = {'x': 0.0, 'y': 0.0}
+        self.loaded = 0
+        self.dropped = 0
+
+    def close(self):
+        self.wanted = set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.pending.clear()
+        if self.polling is not None:
+            self.table_frame.after_cancel(self.polling)
+            self.polling = None
+
+    def on_scroll(self, axis, delta):
+        """note a scroll by delta rows (axis 'y') or columns ('x')"""
+        now = time.monotonic()
+        dt = now - self.last_scroll[axis]
+        self.last_scroll[axis] = now
+        velocity = delta / max(dt, 0.001)
+        if dt > 0.5 or velocity * self.velocity[axis] < 0:
+            self.velocity[axis] = velocity     # a new scroll gesture
+        else:
+            self.velocity[axis] = 0.5 * self.velocity[axis] + 0.5 * velocity
+
+        self.request(self.predict(axis, delta))
+
+    def predict(self, axis, delta):
+        """get the windows (r0, r1, c0, c1) to prefetch"""
+        tf = self.table_frame
+        rows = max(tf.count_row(), 1)
+        cols = max(tf.count_col(), 1)
+        page = rows if axis == 'y' else cols
+        ahead = abs(self.velocity[axis]) * self.lookahead
+        n = max(1, min(self.max_windows, int(ahead / page) + 1))
+        step = page if delta > 0 else -page
+
+        windows = []
+        for i in range(1, n + 1):
+            r0, c0 = tf.offset_y, tf.offset_x
+            if axis == 'y':
+                r0 += step * i
+            else:
+                c0 += step * i
+            if 0 <= r0 < tf.data_rows and 0 <= c0 < tf.data_cols:
+                if tf.row_index is None:
+                    windows.append((r0, r0 + rows, c0, c0 + cols))
+                else:
+                    windows.extend(self._model_windows(
+                        r0, min(r0 + rows, tf.data_rows), c0, c0 + cols))
+        return windows
+
+    def _model_windows(self, r0, r1, c0, c1):
+        """get the backing store windows of view rows r0..r1-1 of a sorted
+        or filtered view, one per run of adjacent tile rows
+        """
+        tf = self.table_frame
+        tile_rows = getattr(tf.model, 'tile_rows', 1)
+        windows = []
+        for tr in sorted({tf.model_row(row) // tile_rows for row in range(r0, r1)}):
+            if windows and windows[-1][1] == tr * tile_rows:
+                windows[-1] = (windows[-1][0], (tr + 1) * tile_rows, c0, c1)
+            else:
+                windows.append((tr * tile_rows, (tr + 1) * tile_rows, c0, c1))
+        return windows
+
+    def request(self, windows):
+        cache = self.table_frame.model
+        if not isinstance(cache, TileCache):
+            return
+        self.wanted = set(windows)
+
+        for window, future in list(self.pending.items()):
+            if window not in self.wanted and future.cancel():
+                del self.pending[window]
+                self.dropped += 1
+
+        for window in windows:
+            if window not in self.pending:
+                future = self.executor.submit(self._load, cache, window)
+                future.window = window
+                future.add_done_callback(self.done.put)
+                self.pending[window] = future
+
+        if self.polling is None:
+            self.polling = self.table_frame.after(self.poll_interval, self._poll)
+
+    def _load(self, cache, window):
+        """runs in a worker thread"""
+        if window not in self.wanted or cache is not self.table_frame.model:
+            return False    # stale
+        cache.prefetch(*window)
+        return True
+
+    def _poll(self):
+        """runs in the Tk main loop"""
+        while True:
+            try:
+                future = self.done.get_nowait()
+            except queue.Empty:
+                break
+            if self.pending.get(future.window) is future:
+                del self.pending[future.window]
+            if future.cancelled():
+                continue
+            if future.exception() is None and future.result():
+                self.loaded += 1
+            else:
+                self.dropped += 1
+
+        if self.pending:
+            self.polling = self.table_frame.after(self.poll_interval, self._poll)
+        else:
+            self.polling = None
+
+
+class AsyncTableModel(TableModel):
+    """Read-only TableModel of data fetched by a coroutine function.
+
+    fetch_block(r0, r1, c0, c1) is awaited for blocks of tile_rows x
+    tile_cols cells, on an asyncio event loop running in a thread beside
+    the Tk main loop, or on loop if given. Until a block has arrived its
+    cells are LOADING and show as placeholders; when it arrives only its
+    cells are redrawn. Up to max_tiles blocks are kept. A block that
+    fails to fetch is shown empty and its exception kept in errors.
+    """
+
+    read_only = True
+
+    def __init__(self, fetch_block, rows, cols, tile_rows=64, tile_cols=16,
+                 max_tiles=1024, loop=None):
+        self.fetch_block = fetch_block
+        self.rows = rows
+        self.cols = cols
+        self.tile_rows = tile_rows
+        self.tile_cols = tile_cols
+        self.max_tiles = max_tiles
+
+        self.tiles = OrderedDict()  # (tile row, tile col) -> values
+        self.requested = set()
+        self.changed = []
+        self.errors = []
+        self.lock = threading.Lock()
+
+        if loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, daemon=True).start()
+        self.loop = loop
+
+    def row_count(self):
+        return self.rows
+
+    def col_count(self):
+        return self.cols
+
+    def loading(self):
+        return bool(self.requested)
+
+    def changes(self):
+        with self.lock:
+            changed = self.changed
+            self.changed = []
+        return changed
+
+    def _tile_block(self, key):
+        r0 = key[0] * self.tile_rows
+        c0 = key[1] * self.tile_cols
+        return (r0, min(r0 + self.tile_rows, self.rows),
+                c0, min(c0 + self.tile_cols, self.cols))
+
+    async def _fetch(self, key):
+        r0, r1, c0, c1 = self._tile_block(key)
+        try:
+            block = await self.fetch_block(r0, r1, c0, c1)
+            values = [list(row[:c1 - c0]) + [None] * (c1 - c0 - len(row)) for row in block[:r1 - r0]]
+        except Exception as e:
+            self.errors.append(e)
+            values = []
+        values.extend([None] * (c1 - c0) for i in range(r1 - r0 - len(values)))
+
+        with self.lock:
+            self.tiles[key] = values
+            while len(self.tiles) > self.max_tiles:
+                self.tiles.popitem(last=False)
+            self.requested.discard(key)
+            self.changed.append((r0, r1, c0, c1))
+
+    def get_block(self, r0, r1, c0, c1):
+        tile_rows = self.tile_rows
+        tile_cols = self.tile_cols
+        block = [[] for i in range(r1 - r0)]
+        for tr in range(r0 // tile_rows, (max(r1, r0 + 1) - 1) // tile_rows + 1):
+            tr0 = tr * tile_rows
+            rs = max(r0, tr0)
+            re_ = min(r1, tr0 + tile_rows)
+            for tc in range(c0 // tile_cols, (max(c1, c0 + 1) - 1) // tile_cols + 1):
+                tc0 = tc * tile_cols
+                cs = max(c0, tc0)
+                ce = min(c1, tc0 + tile_cols)
+                key = (tr, tc)
+                with self.lock:
+                    values = self.tiles.get(key)
+                    if values is not None:
+                        self.tiles.move_to_end(key)
+                if values is None:
+                    if tr0 < self.rows and tc0 < self.cols:
+                        self._request(key)
+                        fill = LOADING
+                    else:
+                        fill = None
+                    for r in range(rs, re_):
+                        block[r - r0].extend([fill] * (ce - cs))
+                else:
+                    for r in range(rs, re_):
+                        row = values[r - tr0] if r - tr0 < len(values) else []
+                        part = row[cs - tc0:ce - tc0]
+                        block[r - r0].extend(part + [None] * (ce - cs - len(part)))
+        return block
+
+    def _request(self, key):
+        with self.lock:
+            if key in self.requested:
+                return
+            self.requested.add(key)
+        asyncio.run_coroutine_threadsafe(self._fetch(key), self.loop)
+
+    def invalidate_all(self):
+        """fetch everything again when next shown"""
+        with self.lock:
+            self.tiles.clear()
+
+
 def test_table_frame(data_size='small'):
 
     LARGE = 2000
@@ -1162,20 +4384,6 @@ def test_table_frame(data_size='small'):
     root.mainloop()
 
 
-def sortby(tree, col, descending):
-    """Sort tree contents when a column is clicked on."""
-    # grab values to sort
-    data = [(tree.set(child, col), child) for child in tree.get_children('')]
-
-    # reorder data
-    data.sort(reverse=descending)
-    for indx, item in enumerate(data):
-        tree.move(item[1], '', indx)
-
-    # switch the heading so that it will sort in the opposite direction
-    tree.heading(col,
-                 command=lambda col=col: sortby(tree, col, int(not descending)))
-
 def autoscroll(sbar, first, last):
     """Hide and show scrollbar as needed."""
     first, last = float(first), float(last)